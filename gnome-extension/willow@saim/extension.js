@@ -8,9 +8,6 @@ import * as PanelMenu from 'resource:///org/gnome/shell/ui/panelMenu.js';
 import * as PopupMenu from 'resource:///org/gnome/shell/ui/popupMenu.js';
 import {Extension} from 'resource:///org/gnome/shell/extensions/extension.js';
 
-// Import modular components
-import {ConfigManager} from './lib/ConfigManager.js';
-
 // D-Bus interface XML
 const VoiceAssistantIface = `
 <node>
@@ -76,6 +73,33 @@ const VoiceAssistantIface = `
 
 const VoiceAssistantProxy = Gio.DBusProxy.makeProxyWrapper(VoiceAssistantIface);
 
+// Delay used to coalesce bursts of D-Bus signals into a single redraw
+const DISPLAY_UPDATE_DELAY_MS = 50;
+
+// Panel icon and style class per mode, built once instead of on every display
+// update. Icons are shared GIcons so St doesn't allocate and compare a fresh
+// themed icon each time. Colors live in stylesheet.css so St parses them once at load rather
+// than re-parsing an inline style string on each update.
+const STOPPED_DISPLAY = Object.freeze({
+    gicon: new Gio.ThemedIcon({name: 'microphone-disabled-symbolic'}),
+    iconClass: null,
+});
+
+const MODE_DISPLAY = Object.freeze({
+    normal: Object.freeze({
+        gicon: new Gio.ThemedIcon({name: 'microphone-sensitivity-medium-symbolic'}),
+        iconClass: null,
+    }),
+    command: Object.freeze({
+        gicon: new Gio.ThemedIcon({name: 'microphone-sensitivity-high-symbolic'}),
+        iconClass: 'willow-icon-command', // Red for command mode
+    }),
+    typing: Object.freeze({
+        gicon: new Gio.ThemedIcon({name: 'input-keyboard-symbolic'}),
+        iconClass: null,
+    }),
+});
+
 const VoiceAssistantIndicator = GObject.registerClass(
 class VoiceAssistantIndicator extends PanelMenu.Button {
     _init(settings) {
@@ -92,6 +116,7 @@ class VoiceAssistantIndicator extends PanelMenu.Button {
             style_class: 'system-status-icon'
         });
         this._box.add_child(this._icon);
+        this._iconClass = null;
         
         this._bufferLabel = new St.Label({
             text: '',
@@ -107,7 +132,6 @@ class VoiceAssistantIndicator extends PanelMenu.Button {
         
         // Settings
         this._settings = settings;
-        this._configManager = new ConfigManager(this._settings);
         
         // Setup D-Bus connection
         this._setupDBus();
@@ -147,55 +171,65 @@ class VoiceAssistantIndicator extends PanelMenu.Button {
     _onDBusConnected() {
         console.log('Willow: Connected to D-Bus service');
         
-        // Connect to signals
-        this._proxy.connectSignal('ModeChanged', (proxy, sender, [newMode, oldMode]) => {
-            this._onModeChanged(newMode, oldMode);
-        });
-        
-        this._proxy.connectSignal('BufferChanged', (proxy, sender, [buffer]) => {
-            this._onBufferChanged(buffer);
-        });
-        
-        this._proxy.connectSignal('CommandExecuted', (proxy, sender, [command, phrase, confidence]) => {
-            this._onCommandExecuted(command, phrase, confidence);
-        });
-        
-        this._proxy.connectSignal('StatusChanged', (proxy, sender, [status]) => {
-            this._onStatusChanged(status);
-        });
-        
-        this._proxy.connectSignal('Error', (proxy, sender, [message, details]) => {
-            this._onError(message, details);
+        // Connect to signals (IDs kept so destroy() can drop the closures)
+        this._signalIds = [
+            this._proxy.connectSignal('ModeChanged', (proxy, sender, [newMode, oldMode]) => {
+                this._onModeChanged(newMode, oldMode);
+            }),
+            this._proxy.connectSignal('BufferChanged', (proxy, sender, [buffer]) => {
+                this._onBufferChanged(buffer);
+            }),
+            this._proxy.connectSignal('CommandExecuted', (proxy, sender, [command, phrase, confidence]) => {
+                this._onCommandExecuted(command, phrase, confidence);
+            }),
+            this._proxy.connectSignal('StatusChanged', (proxy, sender, [status]) => {
+                this._onStatusChanged(status);
+            }),
+            this._proxy.connectSignal('Error', (proxy, sender, [message, details]) => {
+                this._onError(message, details);
+            }),
+            this._proxy.connectSignal('Notification', (proxy, sender, [title, message, urgency]) => {
+                this._onNotification(title, message, urgency);
+            }),
+        ];
+        
+        // Get initial status and auto-start the service if it's not
+        // already running, from the same reply
+        this._updateStatus(status => {
+            if (!status.is_running || !status.is_running.unpack()) {
+                console.log('Willow: Auto-starting service');
+                this._startService();
+            }
         });
         
-        this._proxy.connectSignal('Notification', (proxy, sender, [title, message, urgency]) => {
-            this._onNotification(title, message, urgency);
+        // The status poll doesn't carry the buffer; fetch it once here and
+        // follow BufferChanged from then on
+        this._proxy.GetBufferRemote((result, error) => {
+            if (error) {
+                console.error('Willow: GetBuffer error:', error);
+                return;
+            }
+            
+            this._onBufferChanged(result[0]);
         });
         
-        // Get initial status and auto-start if not running
-        this._updateStatus();
-        
-        // Auto-start the service if it's not already running
-        try {
-            this._proxy.IsRunning = false; // Force initial check
-            GLib.timeout_add(GLib.PRIORITY_DEFAULT, 500, () => {
-                this._proxy.GetStatusRemote((result, error) => {
-                    if (!error && result) {
-                        const [status] = result;
-                        if (!status.is_running || !status.is_running.unpack()) {
-                            console.log('Willow: Auto-starting service');
-                            this._startService();
-                        }
-                    }
-                });
-                return GLib.SOURCE_REMOVE;
-            });
-        } catch (e) {
-            console.log('Willow: Auto-start check failed:', e);
+        // Poll status periodically
+        this._startStatusTimer();
+    }
+    
+    /**
+     * (Re)install the single status poll timer using the configured
+     * update-interval. Second-granularity timeouts let GLib batch the
+     * wakeup with the rest of the shell's per-second timers.
+     */
+    _startStatusTimer() {
+        if (this._statusTimer) {
+            GLib.source_remove(this._statusTimer);
+            this._statusTimer = null;
         }
         
-        // Poll status periodically
-        this._statusTimer = GLib.timeout_add_seconds(GLib.PRIORITY_DEFAULT, 2, () => {
+        const interval = this._settings.get_int('update-interval');
+        this._statusTimer = GLib.timeout_add_seconds(GLib.PRIORITY_DEFAULT, interval, () => {
             this._updateStatus();
             return GLib.SOURCE_CONTINUE;
         });
@@ -279,11 +313,16 @@ class VoiceAssistantIndicator extends PanelMenu.Button {
         // When settings change, sync to D-Bus service
         const syncableKeys = ['hotword', 'command-threshold', 'processing-interval', 'gpu-acceleration'];
         
-        syncableKeys.forEach(key => {
+        this._settingsIds = syncableKeys.map(key =>
             this._settings.connect(`changed::${key}`, () => {
                 this._syncSettingsToService();
-            });
-        });
+            })
+        );
+        
+        this._settingsIds.push(this._settings.connect('changed::update-interval', () => {
+            if (this._statusTimer)
+                this._startStatusTimer();
+        }));
     }
     
     _syncSettingsToService() {
@@ -372,31 +411,37 @@ class VoiceAssistantIndicator extends PanelMenu.Button {
         }
     }
     
-    _updateStatus() {
+    /**
+     * Fetch the service status and apply it. This is the one GetStatus
+     * reply handler, shared by the poll timer and the initial connect,
+     * which passes onStatus to also inspect the status dict.
+     */
+    _updateStatus(onStatus = null) {
+        // Called from the poll timer; the proxy guard is the only failure
+        // mode, so no per-tick try/catch is needed
         if (!this._proxy) return;
         
-        try {
-            this._proxy.GetStatusRemote((result, error) => {
-                if (error) {
-                    console.error('Willow: GetStatus error:', error);
-                    return;
-                }
-                
-                if (result && result[0]) {
-                    const status = result[0];
-                    this._onStatusChanged(status);
-                }
-            });
-        } catch (e) {
-            console.error('Willow: GetStatus exception:', e);
-        }
+        this._proxy.GetStatusRemote((result, error) => {
+            if (error) {
+                console.error('Willow: GetStatus error:', error);
+                return;
+            }
+            
+            if (result && result[0]) {
+                const status = result[0];
+                this._onStatusChanged(status);
+                onStatus?.(status);
+            }
+        });
     }
     
     // Signal handlers
     
     _onModeChanged(newMode, oldMode) {
         this._currentMode = newMode;
-        this._updateDisplay();
+        // Every mode worker starts with an empty buffer
+        this._currentBuffer = '';
+        this._queueDisplayUpdate();
         
         // Mode changes are shown in the panel, no notification needed
         console.log(`Willow: Mode changed from ${oldMode} to ${newMode}`);
@@ -404,7 +449,7 @@ class VoiceAssistantIndicator extends PanelMenu.Button {
     
     _onBufferChanged(buffer) {
         this._currentBuffer = buffer;
-        this._updateDisplay();
+        this._queueDisplayUpdate();
     }
     
     _onCommandExecuted(command, phrase, confidence) {
@@ -420,11 +465,8 @@ class VoiceAssistantIndicator extends PanelMenu.Button {
         if (status.current_mode !== undefined) {
             this._currentMode = status.current_mode.unpack();
         }
-        if (status.current_buffer !== undefined) {
-            this._currentBuffer = status.current_buffer.unpack();
-        }
         
-        this._updateDisplay();
+        this._queueDisplayUpdate();
     }
     
     _onError(message, details) {
@@ -438,25 +480,44 @@ class VoiceAssistantIndicator extends PanelMenu.Button {
     
     // UI updates
     
+    /**
+     * Schedule a display refresh, coalescing bursts of signals (buffer
+     * updates while speaking, mode change + status poll) into one redraw
+     */
+    _queueDisplayUpdate() {
+        if (this._displayUpdateId)
+            return;
+        
+        this._displayUpdateId = GLib.timeout_add(GLib.PRIORITY_DEFAULT, DISPLAY_UPDATE_DELAY_MS, () => {
+            this._displayUpdateId = null;
+            this._updateDisplay();
+            return GLib.SOURCE_REMOVE;
+        });
+    }
+    
     _updateDisplay() {
-        // Update icon based on mode
-        let iconName = 'microphone-sensitivity-medium-symbolic';
-        let iconStyle = '';
-        
-        if (!this._isRunning) {
-            iconName = 'microphone-disabled-symbolic';
-        } else if (this._currentMode === 'command') {
-            iconName = 'microphone-sensitivity-high-symbolic';
-            iconStyle = 'color: #ff4444;'; // Red for command mode
-        } else if (this._currentMode === 'typing') {
-            iconName = 'input-keyboard-symbolic';
-        }
+        // Status polls mostly report what is already shown; skip the redraw
+        if (this._renderedRunning === this._isRunning &&
+            this._renderedMode === this._currentMode &&
+            this._renderedBuffer === this._currentBuffer)
+            return;
+        
+        this._renderedRunning = this._isRunning;
+        this._renderedMode = this._currentMode;
+        this._renderedBuffer = this._currentBuffer;
         
-        this._icon.icon_name = iconName;
-        if (iconStyle) {
-            this._icon.style = iconStyle;
-        } else {
-            this._icon.style = '';
+        // Update icon based on mode
+        const display = this._isRunning
+            ? (MODE_DISPLAY[this._currentMode] ?? MODE_DISPLAY.normal)
+            : STOPPED_DISPLAY;
+        
+        this._icon.gicon = display.gicon;
+        if (display.iconClass !== this._iconClass) {
+            if (this._iconClass)
+                this._icon.remove_style_class_name(this._iconClass);
+            if (display.iconClass)
+                this._icon.add_style_class_name(display.iconClass);
+            this._iconClass = display.iconClass;
         }
         
         // Update buffer text
@@ -501,9 +562,23 @@ class VoiceAssistantIndicator extends PanelMenu.Button {
             GLib.source_remove(this._statusTimer);
             this._statusTimer = null;
         }
+        if (this._displayUpdateId) {
+            GLib.source_remove(this._displayUpdateId);
+            this._displayUpdateId = null;
+        }
         
-        // Clean up D-Bus proxy
+        // Disconnect settings handlers so the settings object doesn't keep us alive
+        if (this._settingsIds) {
+            this._settingsIds.forEach(id => this._settings.disconnect(id));
+            this._settingsIds = null;
+        }
+        
+        // Clean up D-Bus proxy and its signal handlers
         if (this._proxy) {
+            if (this._signalIds) {
+                this._signalIds.forEach(id => this._proxy.disconnectSignal(id));
+                this._signalIds = null;
+            }
             this._proxy = null;
         }
         
@@ -362,6 +362,10 @@ export class CommandManager {
     }
 
     _loadCommands(listBox) {
+        // Hide the list while it is rebuilt so GTK lays it out once at the
+        // end instead of after every removed/appended row
+        listBox.set_visible(false);
+
         // Clear existing rows
         let child = listBox.get_first_child();
         while (child) {
@@ -386,6 +390,8 @@ export class CommandManager {
             );
             listBox.append(row);
         });
+
+        listBox.set_visible(true);
     }
 
     _updateCommand(index, newData) {
@@ -7,6 +7,8 @@
 import Gio from 'gi://Gio';
 import GLib from 'gi://GLib';
 
+import {utf8Decoder} from './FileUtils.js';
+
 const VoiceAssistantIface = `
   <node>
   <interface name="com.github.saim.Willow">
@@ -19,14 +21,41 @@ const VoiceAssistantIface = `
 
 const VoiceAssistantProxy = Gio.DBusProxy.makeProxyWrapper(VoiceAssistantIface);
 
+// Default configuration, serialized once at module load; each caller gets
+// its own parsed copy since configs are modified in place
+const DEFAULT_CONFIG_JSON = JSON.stringify({
+    "hotword": "hey",
+    "command_threshold": 80,
+    "processing_interval": 1.5,
+    "gpu_acceleration": false,
+    "logging": {
+        "level": "INFO",
+        "file": "/tmp/willow.log"
+    },
+    "commands": [],
+    "typing_mode": {
+        "exit_phrases": [
+            "stop typing",
+            "exit typing",
+            "normal mode",
+            "go to normal mode"
+        ],
+        "check_recent_chars": 100
+    }
+});
+
 export class ConfigManager {
     constructor(settings) {
         this._settings = settings;
         this._configPath = GLib.get_home_dir() + '/.config/willow/config.json';
         this._configFile = Gio.File.new_for_path(this._configPath);
         this._config = null;
+        // Raw file text and the etag it was read at, so unchanged files are not re-read
+        this._fileText = null;
+        this._fileEtag = null;
+        // Created on the first config change: building the proxy is a
+        // synchronous D-Bus round trip that just reading the config doesn't need
         this._proxy = null;
-        this._initDbusProxy();
     }
 
     /**
@@ -48,6 +77,9 @@ export class ConfigManager {
      * Notify D-Bus service of config changes
      */
     _notifyServiceConfigChanged(config) {
+        if (!this._proxy) {
+            this._initDbusProxy();
+        }
         if (!this._proxy) {
             return;
         }
@@ -66,19 +98,43 @@ export class ConfigManager {
         }
     }
 
+    /**
+     * Read the config file text, or null if it does not exist.
+     * The file is only read again when its etag (mtime based) changes.
+     */
+    _readConfigText() {
+        let info;
+        try {
+            info = this._configFile.query_info('etag::value', Gio.FileQueryInfoFlags.NONE, null);
+        } catch (e) {
+            if (e.matches(Gio.IOErrorEnum, Gio.IOErrorEnum.NOT_FOUND)) {
+                this._fileText = null;
+                this._fileEtag = null;
+                return null;
+            }
+            throw e;
+        }
+
+        const etag = info.get_etag();
+        if (this._fileText === null || etag === null || etag !== this._fileEtag) {
+            const [, contents, loadedEtag] = this._configFile.load_contents(null);
+            this._fileText = utf8Decoder.decode(contents);
+            this._fileEtag = loadedEtag;
+        }
+        return this._fileText;
+    }
+
     /**
      * Load configuration from file
      */
     loadConfig() {
         try {
-            if (this._configFile.query_exists(null)) {
-                let [success, contents] = this._configFile.load_contents(null);
-                if (success) {
-                    this._config = JSON.parse(new TextDecoder().decode(contents));
-                    // Filter out comment fields (they start with _)
-                    this._config = this._filterComments(this._config);
-                    return this._config;
-                }
+            const text = this._readConfigText();
+            if (text !== null) {
+                this._config = JSON.parse(text);
+                // Filter out comment fields (they start with _)
+                this._config = this._filterComments(this._config);
+                return this._config;
             }
             return this._getDefaultConfig();
         } catch (e) {
@@ -100,22 +156,25 @@ export class ConfigManager {
 
             // Read existing config to preserve comments
             let existingConfig = {};
-            if (this._configFile.query_exists(null)) {
-                try {
-                    let [success, contents] = this._configFile.load_contents(null);
-                    if (success) {
-                        existingConfig = JSON.parse(new TextDecoder().decode(contents));
-                    }
-                } catch (e) {
-                    console.log(`ConfigManager: Could not load existing config for comment preservation: ${e}`);
+            try {
+                const text = this._readConfigText();
+                if (text !== null) {
+                    existingConfig = JSON.parse(text);
                 }
+            } catch (e) {
+                console.log(`ConfigManager: Could not load existing config for comment preservation: ${e}`);
             }
 
             // Merge: preserve comment fields from existing, update actual values from new config
             const mergedConfig = this._mergePreservingComments(existingConfig, config);
 
+            // Skip the write when the file already holds exactly this config
             const configJson = JSON.stringify(mergedConfig, null, 2);
-            this._configFile.replace_contents(configJson, null, false, Gio.FileCreateFlags.NONE, null);
+            if (configJson !== this._fileText) {
+                const [, etag] = this._configFile.replace_contents(configJson, null, false, Gio.FileCreateFlags.NONE, null);
+                this._fileText = configJson;
+                this._fileEtag = etag;
+            }
             this._config = config; // Store the clean version internally
             
             // Notify D-Bus service of config change
@@ -228,28 +287,9 @@ export class ConfigManager {
     }
 
     /**
-     * Get default configuration structure
+     * Get default configuration structure (a fresh copy the caller may modify)
      */
     _getDefaultConfig() {
-        return {
-            "hotword": "hey",
-            "command_threshold": 80,
-            "processing_interval": 1.5,
-            "gpu_acceleration": false,
-            "logging": {
-                "level": "INFO",
-                "file": "/tmp/willow.log"
-            },
-            "commands": [],
-            "typing_mode": {
-                "exit_phrases": [
-                    "stop typing",
-                    "exit typing",
-                    "normal mode",
-                    "go to normal mode"
-                ],
-                "check_recent_chars": 100
-            }
-        };
+        return JSON.parse(DEFAULT_CONFIG_JSON);
     }
 }
@@ -0,0 +1,7 @@
+/**
+ * FileUtils.js - Helpers shared by the library modules
+ */
+
+// One decoder for file contents (Gio load_contents() bytes) shared by every
+// module, instead of each module creating its own
+export const utf8Decoder = new TextDecoder();
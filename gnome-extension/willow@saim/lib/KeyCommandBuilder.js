@@ -135,6 +135,33 @@ export const COMMON_SHORTCUTS = {
     'Move Right Workspace': ['Super', 'Right']
 };
 
+// Lookup tables derived once from the key maps above
+const MODIFIER_KEYS = new Set(KEY_CATEGORIES['Modifiers']);
+const KEY_NAMES_BY_CODE = new Map(Object.entries(KEY_CODES).map(([key, code]) => [code, key]));
+
+// Subset of shortcuts offered as one-click buttons in the builder
+const POPULAR_SHORTCUTS = {
+    'Copy': ['Ctrl', 'C'],
+    'Paste': ['Ctrl', 'V'],
+    'Cut': ['Ctrl', 'X'],
+    'Undo': ['Ctrl', 'Z'],
+    'Save': ['Ctrl', 'S'],
+    'Find': ['Ctrl', 'F'],
+    'New Tab': ['Ctrl', 'T'],
+    'Close': ['Ctrl', 'W'],
+    'Switch App': ['Alt', 'Tab'],
+};
+
+// Most used key categories shown in the builder
+const BUILDER_CATEGORIES = {
+    'Modifiers': KEY_CATEGORIES['Modifiers'],
+    'Letters': KEY_CATEGORIES['Letters'],
+    'Numbers': KEY_CATEGORIES['Numbers'],
+    'Function Keys': KEY_CATEGORIES['Function Keys'].slice(0, 8), // Only F1-F8
+    'Navigation': KEY_CATEGORIES['Navigation'],
+    'Common Keys': ['Enter', 'Space', 'Backspace', 'Tab', 'Escape']
+};
+
 export const KeyCommandBuilder = GObject.registerClass({
     GTypeName: 'KeyCommandBuilder',
     Signals: {
@@ -252,19 +279,7 @@ export const KeyCommandBuilder = GObject.registerClass({
         });
 
         // Show only most common shortcuts
-        const popularShortcuts = {
-            'Copy': ['Ctrl', 'C'],
-            'Paste': ['Ctrl', 'V'],
-            'Cut': ['Ctrl', 'X'],
-            'Undo': ['Ctrl', 'Z'],
-            'Save': ['Ctrl', 'S'],
-            'Find': ['Ctrl', 'F'],
-            'New Tab': ['Ctrl', 'T'],
-            'Close': ['Ctrl', 'W'],
-            'Switch App': ['Alt', 'Tab'],
-        };
-
-        Object.entries(popularShortcuts).forEach(([name, keys]) => {
+        Object.entries(POPULAR_SHORTCUTS).forEach(([name, keys]) => {
             const button = new Gtk.Button({
                 label: name,
                 tooltip_text: keys.join(' + '),
@@ -289,16 +304,7 @@ export const KeyCommandBuilder = GObject.registerClass({
 
     _createCompactKeyCategories(container) {
         // Most used categories as expandable rows
-        const importantCategories = {
-            'Modifiers': KEY_CATEGORIES['Modifiers'],
-            'Letters': KEY_CATEGORIES['Letters'],
-            'Numbers': KEY_CATEGORIES['Numbers'],
-            'Function Keys': KEY_CATEGORIES['Function Keys'].slice(0, 8), // Only F1-F8
-            'Navigation': KEY_CATEGORIES['Navigation'],
-            'Common Keys': ['Enter', 'Space', 'Backspace', 'Tab', 'Escape']
-        };
-
-        Object.entries(importantCategories).forEach(([category, keys]) => {
+        Object.entries(BUILDER_CATEGORIES).forEach(([category, keys]) => {
             const expander = new Adw.ExpanderRow({
                 title: category,
                 subtitle: `${keys.length} keys`,
@@ -329,34 +335,35 @@ export const KeyCommandBuilder = GObject.registerClass({
     }
 
     _createCompactKeyButton(key, category) {
-        const isModifier = KEY_CATEGORIES['Modifiers'].includes(key);
+        const isModifier = MODIFIER_KEYS.has(key);
         const isSelected = this._selectedKeys.includes(key);
 
+        // Compact styling, passed at construction time
+        const cssClasses = ['flat'];
+        
+        if (isModifier) {
+            cssClasses.push('suggested-action');
+        }
+
+        if (category === 'Function Keys') {
+            cssClasses.push('pill');
+        }
+
         const button = new Gtk.ToggleButton({
             label: key,
             active: isSelected,
             tooltip_text: `${key} (${KEY_CODES[key]})`,
             width_request: 32,
             height_request: 28,
+            css_classes: cssClasses,
         });
 
-        // Compact styling
-        button.add_css_class('flat');
-        
-        if (isModifier) {
-            button.add_css_class('suggested-action');
-        }
-
-        if (category === 'Function Keys') {
-            button.add_css_class('pill');
-        }
-
         button.connect('toggled', () => {
             if (button.get_active()) {
                 if (!this._selectedKeys.includes(key)) {
                     // Add modifiers first, then other keys
                     if (isModifier) {
-                        const modifierIndex = this._selectedKeys.findIndex(k => !KEY_CATEGORIES['Modifiers'].includes(k));
+                        const modifierIndex = this._selectedKeys.findIndex(k => !MODIFIER_KEYS.has(k));
                         if (modifierIndex === -1) {
                             this._selectedKeys.push(key);
                         } else {
@@ -529,7 +536,7 @@ export const KeyCommandBuilder = GObject.registerClass({
         
         pressEvents.forEach(event => {
             const code = parseInt(event.split(':')[0]);
-            const key = Object.keys(KEY_CODES).find(k => KEY_CODES[k] === code);
+            const key = KEY_NAMES_BY_CODE.get(code);
             if (key && !this._selectedKeys.includes(key)) {
                 this._selectedKeys.push(key);
             }
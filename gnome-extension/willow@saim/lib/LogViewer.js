@@ -8,9 +8,16 @@ import Gtk from 'gi://Gtk';
 import Gio from 'gi://Gio';
 import GLib from 'gi://GLib';
 
+import {utf8Decoder} from './FileUtils.js';
+
 export class LogViewer {
     constructor() {
         this._logFile = '/tmp/willow.log';
+        // Log dialog reused across opens, and the preferences window it belongs to
+        this._logWindow = null;
+        this._logTextView = null;
+        this._logParent = null;
+        this._logParentDestroyId = 0;
     }
 
     /**
@@ -217,32 +224,67 @@ export class LogViewer {
         console.error('Could not find a suitable terminal emulator');
     }
 
+    /**
+     * Read the log file, returning null (after notifying) on failure
+     */
+    _readLogText(window) {
+        const file = Gio.File.new_for_path(this._logFile);
+        if (!file.query_exists(null)) {
+            this._showToast(window, 'Log file not found');
+            return null;
+        }
+
+        const [success, contents] = file.load_contents(null);
+        if (!success) {
+            this._showToast(window, 'Failed to read log file');
+            return null;
+        }
+
+        return utf8Decoder.decode(contents);
+    }
+
+    /**
+     * Replace the text view contents and scroll to the newest entries
+     */
+    _setLogText(textView, logText) {
+        const buffer = textView.get_buffer();
+        buffer.set_text(logText, -1);
+
+        // Scroll to bottom
+        const mark = buffer.get_mark('log-end') ??
+            buffer.create_mark('log-end', buffer.get_end_iter(), false);
+        buffer.move_mark(mark, buffer.get_end_iter());
+        textView.scroll_to_mark(mark, 0.0, true, 0.0, 1.0);
+    }
+
     /**
      * Show log viewer window
      */
     _showLogWindow(window) {
         try {
-            const file = Gio.File.new_for_path(this._logFile);
-            if (!file.query_exists(null)) {
-                this._showToast(window, 'Log file not found');
+            const logText = this._readLogText(window);
+            if (logText === null)
                 return;
-            }
 
-            const [success, contents] = file.load_contents(null);
-            if (!success) {
-                this._showToast(window, 'Failed to read log file');
+            // Reuse the window from a previous open; it is hidden on close
+            if (this._logWindow && this._logWindow.get_transient_for() === window) {
+                this._setLogText(this._logTextView, logText);
+                this._logWindow.present();
                 return;
             }
 
-            const logText = new TextDecoder().decode(contents);
+            // A dialog kept for an earlier preferences window is replaced
+            this._logWindow?.destroy();
 
             // Create dialog
             const dialog = new Adw.Window({
                 modal: true,
                 transient_for: window,
+                destroy_with_parent: true,
                 default_width: 800,
                 default_height: 600,
                 title: 'Voice Assistant Logs',
+                hide_on_close: true,
             });
 
             const headerBar = new Adw.HeaderBar();
@@ -251,10 +293,6 @@ export class LogViewer {
                 icon_name: 'view-refresh-symbolic',
                 tooltip_text: 'Refresh logs',
             });
-            refreshButton.connect('clicked', () => {
-                dialog.close();
-                this._showLogWindow(window);
-            });
             headerBar.pack_end(refreshButton);
 
             const box = new Gtk.Box({
@@ -278,17 +316,48 @@ export class LogViewer {
                 right_margin: 12,
             });
 
-            const buffer = textView.get_buffer();
-            buffer.set_text(logText, -1);
+            this._setLogText(textView, logText);
 
-            // Scroll to bottom
-            const mark = buffer.create_mark(null, buffer.get_end_iter(), false);
-            textView.scroll_to_mark(mark, 0.0, true, 0.0, 1.0);
+            // Reload into the existing view instead of rebuilding the window
+            refreshButton.connect('clicked', () => {
+                try {
+                    const text = this._readLogText(window);
+                    if (text !== null)
+                        this._setLogText(textView, text);
+                } catch (e) {
+                    console.error('Error refreshing log window:', e);
+                }
+            });
 
             scrolled.set_child(textView);
             box.append(scrolled);
 
             dialog.set_content(box);
+
+            this._logWindow = dialog;
+            this._logTextView = textView;
+            dialog.connect('destroy', () => {
+                if (this._logWindow === dialog) {
+                    this._logWindow = null;
+                    this._logTextView = null;
+                }
+            });
+
+            // One destroy handler per preferences window, even if the dialog
+            // is recreated for it. The hidden dialog goes with the window.
+            if (this._logParent !== window) {
+                if (this._logParent)
+                    this._logParent.disconnect(this._logParentDestroyId);
+                this._logParent = window;
+                this._logParentDestroyId = window.connect('destroy', () => {
+                    this._logWindow?.destroy();
+                    this._logWindow = null;
+                    this._logTextView = null;
+                    this._logParent = null;
+                    this._logParentDestroyId = 0;
+                });
+            }
+
             dialog.present();
 
         } catch (e) {
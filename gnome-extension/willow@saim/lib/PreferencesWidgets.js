@@ -11,6 +11,8 @@ import GLib from 'gi://GLib';
 export class PreferencesBuilder {
     constructor(settings) {
         this._settings = settings;
+        this._syncKeys = new Set();
+        this._changedId = 0;
     }
 
     /**
@@ -31,133 +33,102 @@ export class PreferencesBuilder {
     }
 
     /**
-     * Create a switch row
+     * Register a key whose changes trigger the sync callback. All keys share
+     * one 'changed' handler instead of a closure per row.
      */
-    createSwitchRow(title, subtitle, settingKey, group) {
-        const row = new Adw.ActionRow({
-            title: title,
-            subtitle: subtitle,
-        });
-
-        const switchWidget = new Gtk.Switch({
-            active: this._settings.get_boolean(settingKey),
-            valign: Gtk.Align.CENTER,
-        });
-
-        this._settings.bind(settingKey, switchWidget, 'active', Gio.SettingsBindFlags.DEFAULT);
-        
-        // Trigger sync when changed
-        if (this._syncCallback) {
-            this._settings.connect(`changed::${settingKey}`, () => {
-                this._syncCallback();
+    _watchSyncKey(settingKey) {
+        if (!this._syncCallback) return;
+
+        this._syncKeys.add(settingKey);
+        if (!this._changedId) {
+            this._changedId = this._settings.connect('changed', (settings, key) => {
+                if (this._syncKeys.has(key)) {
+                    this._syncCallback();
+                }
             });
         }
-        
-        row.add_suffix(switchWidget);
-        group.add(row);
-
-        return { row, widget: switchWidget };
     }
 
     /**
-     * Create an entry row
+     * Wrap a widget bound to a setting in an action row and add it to group
      */
-    createEntryRow(title, subtitle, settingKey, placeholder, group) {
+    _addBoundRow(title, subtitle, settingKey, widget, property, group) {
         const row = new Adw.ActionRow({
             title: title,
             subtitle: subtitle,
         });
 
-        const entry = new Gtk.Entry({
-            text: this._settings.get_string(settingKey),
-            placeholder_text: placeholder,
-            valign: Gtk.Align.CENTER,
-        });
-
-        this._settings.bind(settingKey, entry, 'text', Gio.SettingsBindFlags.DEFAULT);
+        this._settings.bind(settingKey, widget, property, Gio.SettingsBindFlags.DEFAULT);
         
         // Trigger sync when changed
-        if (this._syncCallback) {
-            this._settings.connect(`changed::${settingKey}`, () => {
-                this._syncCallback();
-            });
-        }
+        this._watchSyncKey(settingKey);
         
-        row.add_suffix(entry);
+        row.add_suffix(widget);
         group.add(row);
 
-        return { row, widget: entry };
+        return { row, widget };
     }
 
     /**
-     * Create a spin button row for integers
+     * Create a spin button with the common adjustment settings
      */
-    createSpinButtonRow(title, subtitle, settingKey, min, max, step, group) {
-        const row = new Adw.ActionRow({
-            title: title,
-            subtitle: subtitle,
-        });
-
-        const spinButton = new Gtk.SpinButton({
+    _createSpinButton(min, max, step, value, digits = 0) {
+        return new Gtk.SpinButton({
             adjustment: new Gtk.Adjustment({
                 lower: min,
                 upper: max,
                 step_increment: step,
                 page_increment: step * 2,
-                value: this._settings.get_int(settingKey),
+                value: value,
             }),
+            digits: digits,
             valign: Gtk.Align.CENTER,
         });
-
-        this._settings.bind(settingKey, spinButton, 'value', Gio.SettingsBindFlags.DEFAULT);
-        
-        // Trigger sync when changed
-        if (this._syncCallback) {
-            this._settings.connect(`changed::${settingKey}`, () => {
-                this._syncCallback();
-            });
-        }
-        
-        row.add_suffix(spinButton);
-        group.add(row);
-
-        return { row, widget: spinButton };
     }
 
     /**
-     * Create a spin button row for doubles/floats
+     * Create a switch row
      */
-    createDoubleSpinButtonRow(title, subtitle, settingKey, min, max, step, digits, group) {
-        const row = new Adw.ActionRow({
-            title: title,
-            subtitle: subtitle,
+    createSwitchRow(title, subtitle, settingKey, group) {
+        const switchWidget = new Gtk.Switch({
+            active: this._settings.get_boolean(settingKey),
+            valign: Gtk.Align.CENTER,
         });
 
-        const spinButton = new Gtk.SpinButton({
-            adjustment: new Gtk.Adjustment({
-                lower: min,
-                upper: max,
-                step_increment: step,
-                page_increment: step * 2,
-                value: this._settings.get_double(settingKey),
-            }),
-            digits: digits,
+        return this._addBoundRow(title, subtitle, settingKey, switchWidget, 'active', group);
+    }
+
+    /**
+     * Create an entry row
+     */
+    createEntryRow(title, subtitle, settingKey, placeholder, group) {
+        const entry = new Gtk.Entry({
+            text: this._settings.get_string(settingKey),
+            placeholder_text: placeholder,
             valign: Gtk.Align.CENTER,
         });
 
-        this._settings.bind(settingKey, spinButton, 'value', Gio.SettingsBindFlags.DEFAULT);
-        
-        // Trigger sync when changed
-        if (this._syncCallback) {
-            this._settings.connect(`changed::${settingKey}`, () => {
-                this._syncCallback();
-            });
-        }
-        
-        row.add_suffix(spinButton);
-        group.add(row);
+        return this._addBoundRow(title, subtitle, settingKey, entry, 'text', group);
+    }
+
+    /**
+     * Create a spin button row for integers
+     */
+    createSpinButtonRow(title, subtitle, settingKey, min, max, step, group) {
+        const spinButton = this._createSpinButton(min, max, step,
+            this._settings.get_int(settingKey));
+
+        return this._addBoundRow(title, subtitle, settingKey, spinButton, 'value', group);
+    }
+
+    /**
+     * Create a spin button row for doubles/floats
+     */
+    createDoubleSpinButtonRow(title, subtitle, settingKey, min, max, step, digits, group) {
+        const spinButton = this._createSpinButton(min, max, step,
+            this._settings.get_double(settingKey), digits);
 
-        return { row, widget: spinButton };
+        return this._addBoundRow(title, subtitle, settingKey, spinButton, 'value', group);
     }
 
     /**
@@ -8,6 +8,8 @@ import Gtk from 'gi://Gtk';
 import Gio from 'gi://Gio';
 import GLib from 'gi://GLib';
 
+import {utf8Decoder} from './FileUtils.js';
+
 export class WhisperModelManager {
     constructor() {
         this._modelDir = GLib.get_home_dir() + '/.local/share/willow/models';
@@ -139,9 +141,12 @@ export class WhisperModelManager {
             subtitle: 'Download and select whisper.cpp models',
         });
 
+        // Build every model row in one pass from the state read above,
+        // instead of re-reading the config file for each row
         this._modelRows.clear();
+        const refreshCallback = () => this._refreshUI(group, window);
         for (const model of this._availableModels) {
-            const modelRow = this._createModelRow(model, window, () => this._refreshUI(group, window));
+            const modelRow = this._createModelRow(model, window, refreshCallback, currentModelFile);
             this._expanderRow.add_row(modelRow);
             this._modelRows.set(model.file, modelRow);
         }
@@ -193,9 +198,8 @@ export class WhisperModelManager {
     /**
      * Create a row for each model
      */
-    _createModelRow(model, window, refreshCallback) {
+    _createModelRow(model, window, refreshCallback, currentModel) {
         const isInstalled = this._isModelInstalled(model.file);
-        const currentModel = this._getCurrentModel();
         const isCurrent = currentModel === model.file;
         
         let subtitle = `${model.description} • ${model.size}`;
@@ -280,7 +284,7 @@ export class WhisperModelManager {
             if (configFile.query_exists(null)) {
                 let [success, contents] = configFile.load_contents(null);
                 if (success) {
-                    const config = JSON.parse(new TextDecoder().decode(contents));
+                    const config = JSON.parse(utf8Decoder.decode(contents));
                     if (config.whisper_model) {
                         // Verify the model file actually exists
                         const modelFile = Gio.File.new_for_path(`${this._modelDir}/${config.whisper_model}`);
@@ -379,45 +383,35 @@ export class WhisperModelManager {
 
         this._showToast(window, `Downloading ${model.name} model (${model.size})...`);
 
-        // Monitor download completion
-        const checkCompletion = () => {
-            const file = Gio.File.new_for_path(outputPath);
-            const tempFile = Gio.File.new_for_path(tempPath);
-            
-            // Check if download completed
-            if (file.query_exists(null)) {
-                this._downloadInProgress = false;
-                button.sensitive = true;
-                button.label = 'Download';
-                this._showToast(window, `${model.name} downloaded successfully`);
-                
-                // Refresh UI to show new model
-                if (refreshCallback) {
-                    refreshCallback();
-                }
-                
-                return GLib.SOURCE_REMOVE;
-            }
-            
-            // Check if download failed (temp file gone but no final file)
-            if (!tempFile.query_exists(null) && !file.query_exists(null)) {
-                this._downloadInProgress = false;
-                button.sensitive = true;
-                button.label = 'Download';
-                this._showToast(window, `Download failed for ${model.name}`);
-                return GLib.SOURCE_REMOVE;
+        // Progress comes from the temp file size; completion and failure
+        // come from the download process itself
+        const tempFile = Gio.File.new_for_path(tempPath);
+        let lastProgress = null;
+        let progressId = 0;
+
+        const finishDownload = (message) => {
+            if (progressId) {
+                GLib.source_remove(progressId);
+                progressId = 0;
             }
-            
-            // Update progress by checking temp file size
-            if (tempFile.query_exists(null)) {
-                try {
-                    const info = tempFile.query_info('standard::size', Gio.FileQueryInfoFlags.NONE, null);
-                    const bytes = info.get_size();
-                    const mb = (bytes / (1024 * 1024)).toFixed(0);
-                    button.label = `${mb} MB...`;
-                } catch (e) {
-                    // Ignore errors during progress check
+            this._downloadInProgress = false;
+            button.sensitive = true;
+            button.label = 'Download';
+            this._showToast(window, message);
+        };
+
+        const updateProgress = () => {
+            try {
+                const info = tempFile.query_info('standard::size', Gio.FileQueryInfoFlags.NONE, null);
+                
+                // Only touch the button when the displayed value changes
+                const progress = `${(info.get_size() / (1024 * 1024)).toFixed(0)} MB...`;
+                if (progress !== lastProgress) {
+                    button.label = progress;
+                    lastProgress = progress;
                 }
+            } catch (e) {
+                // Temp file not created yet; ignore errors during progress check
             }
             
             return GLib.SOURCE_CONTINUE;
@@ -425,10 +419,30 @@ export class WhisperModelManager {
 
         // Run download in background
         try {
-            GLib.spawn_command_line_async(`sh -c '${command} && notify-send "Willow" "Model ${model.name} downloaded successfully"'`);
+            const proc = Gio.Subprocess.new(
+                ['sh', '-c', `${command} && { notify-send "Willow" "Model ${model.name} downloaded successfully" || true; }`],
+                Gio.SubprocessFlags.NONE
+            );
+            
+            proc.wait_check_async(null, (p, res) => {
+                try {
+                    p.wait_check_finish(res);
+                } catch (e) {
+                    finishDownload(`Download failed for ${model.name}`);
+                    return;
+                }
+                
+                finishDownload(`${model.name} downloaded successfully`);
+                
+                // Refresh UI to show new model
+                if (refreshCallback) {
+                    refreshCallback();
+                }
+            });
             
-            // Poll for completion every second for better responsiveness
-            GLib.timeout_add(GLib.PRIORITY_DEFAULT, 1000, checkCompletion);
+            // Update the progress label every second; a seconds timeout
+            // shares its wakeup with other per-second timers
+            progressId = GLib.timeout_add_seconds(GLib.PRIORITY_DEFAULT, 1, updateProgress);
         } catch (e) {
             console.error('Download error:', e);
             this._downloadInProgress = false;
@@ -458,7 +472,7 @@ export class WhisperModelManager {
                 return;
             }
             
-            let config = JSON.parse(new TextDecoder().decode(contents));
+            let config = JSON.parse(utf8Decoder.decode(contents));
             
             // Update the whisper_model field
             config.whisper_model = model.file;
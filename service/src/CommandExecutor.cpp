@@ -6,13 +6,25 @@
 #include <iomanip>
 #include <sstream>
 #include <algorithm>
+#include <bitset>
+#include <cstdint>
 #include <sys/wait.h>
 #include <cctype>
+#include <cstring>
+#include <thread>
+#include <spawn.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+extern char** environ;
 
 namespace VoiceAssistant {
 
 CommandExecutor::CommandExecutor()
     : m_logFile("/tmp/willow.log")
+    , m_minLogLevel(levelRank("INFO"))
+    , m_ydotoolFound(false)
+    , m_stopInput(false)
 {
     // Load context config from default location
     const char* home = std::getenv("HOME");
@@ -22,26 +34,115 @@ CommandExecutor::CommandExecutor()
     }
 }
 
+CommandExecutor::~CommandExecutor() {
+    // The input thread finishes whatever is still queued, then exits
+    {
+        std::lock_guard<std::mutex> lock(m_inputMutex);
+        m_stopInput = true;
+    }
+    m_inputReady.notify_all();
+    
+    if (m_inputThread.joinable()) {
+        m_inputThread.join();
+    }
+}
+
 void CommandExecutor::executeCommand(const std::string& command) {
     log("INFO", "Executing command: " + command);
     
     // Build command with proper environment and background execution
     // Using systemd-run ensures the app gets proper user session environment
-    std::string execCmd = "systemd-run --user --scope --slice=app.slice " + command + " &";
+    std::string execCmd = "systemd-run --user --scope --slice=app.slice " + command;
     
     log("INFO", "Full command: " + execCmd);
     
-    // Execute the command in background
-    int result = std::system(execCmd.c_str());
+    // Plain "program arg..." commands are spawned directly; only commands
+    // using shell syntax (quotes, pipes, variables, ...) need /bin/sh
+    std::vector<std::string> args = {"systemd-run", "--user", "--scope", "--slice=app.slice"};
+    if (!splitPlainCommand(command, args)) {
+        args = {"/bin/sh", "-c", execCmd};
+    }
     
-    // systemd-run returns 0 if it successfully started the scope
-    if (result == 0 || WIFEXITED(result)) {
+    // Execute the command in background
+    if (spawnDetached(args)) {
         log("INFO", "Command executed successfully");
     } else {
-        log("ERROR", "Command execution failed with code: " + std::to_string(result));
+        log("ERROR", "Command execution failed: " + execCmd);
     }
 }
 
+bool CommandExecutor::splitPlainCommand(const std::string& command, std::vector<std::string>& args) {
+    static const std::string plainChars = "-_./=:,@%+";
+    
+    std::vector<std::string> words;
+    std::string word;
+    for (char c : command) {
+        if (c == ' ' || c == '\t') {
+            if (!word.empty()) {
+                words.push_back(std::move(word));
+                word.clear();
+            }
+        } else if (std::isalnum(static_cast<unsigned char>(c)) || plainChars.find(c) != std::string::npos) {
+            word += c;
+        } else {
+            return false;  // Needs the shell
+        }
+    }
+    if (!word.empty()) {
+        words.push_back(std::move(word));
+    }
+    if (words.empty()) {
+        return false;
+    }
+    
+    args.insert(args.end(), words.begin(), words.end());
+    return true;
+}
+
+bool CommandExecutor::spawnProcess(const std::vector<std::string>& args, pid_t& pid) {
+    std::vector<char*> argv;
+    for (const auto& arg : args) {
+        argv.push_back(const_cast<char*>(arg.c_str()));
+    }
+    argv.push_back(nullptr);
+    
+    int err = posix_spawnp(&pid, argv[0], nullptr, nullptr, argv.data(), environ);
+    if (err != 0) {
+        log("ERROR", "Failed to start " + args[0] + ": " + std::strerror(err));
+        return false;
+    }
+    return true;
+}
+
+bool CommandExecutor::spawnAndWait(const std::vector<std::string>& args) {
+    pid_t pid;
+    if (!spawnProcess(args, pid)) {
+        return false;
+    }
+    
+    int status;
+    if (waitpid(pid, &status, 0) < 0) {
+        return false;
+    }
+    return WIFEXITED(status) && WEXITSTATUS(status) == 0;
+}
+
+bool CommandExecutor::spawnDetached(const std::vector<std::string>& args) {
+    pid_t pid;
+    if (!spawnProcess(args, pid)) {
+        return false;
+    }
+    
+    // systemd-run --scope stays in the foreground for as long as the app
+    // runs, so reap it from a detached thread rather than waiting here
+    std::thread([pid]() {
+        int status;
+        waitpid(pid, &status, 0);
+    }).detach();
+    
+    return true;
+}
+
 void CommandExecutor::typeText(const std::string& text) {
     if (text.empty()) return;
     
@@ -52,13 +153,9 @@ void CommandExecutor::typeText(const std::string& text) {
     
     log("INFO", "Typing text: " + text);
     
-    // Use ydotool to type the text
-    std::string command = "ydotool type '" + escapeForShell(text) + "'";
-    
-    int result = std::system(command.c_str());
-    if (result != 0) {
-        log("ERROR", "Failed to type text via ydotool");
-    }
+    // Use ydotool to type the text; passed as one argument, so it needs
+    // no shell quoting
+    queueInput({"ydotool", "type", text});
 }
 
 void CommandExecutor::pressKey(const std::string& keyCode) {
@@ -67,8 +164,13 @@ void CommandExecutor::pressKey(const std::string& keyCode) {
         return;
     }
     
-    std::string command = "ydotool key " + keyCode;
-    std::system(command.c_str());
+    // keyCode may hold several space-separated codes
+    std::vector<std::string> args = {"ydotool", "key"};
+    std::istringstream codes(keyCode);
+    for (std::string code; codes >> code;) {
+        args.push_back(code);
+    }
+    queueInput(std::move(args));
 }
 
 void CommandExecutor::pressKeyCombo(const std::vector<std::string>& keyCodes) {
@@ -77,58 +179,129 @@ void CommandExecutor::pressKeyCombo(const std::vector<std::string>& keyCodes) {
         return;
     }
     
-    std::string command = "ydotool key";
-    for (const auto& keyCode : keyCodes) {
-        command += " " + keyCode;
-    }
-    std::system(command.c_str());
+    std::vector<std::string> args = {"ydotool", "key"};
+    args.insert(args.end(), keyCodes.begin(), keyCodes.end());
+    queueInput(std::move(args));
 }
 
-double CommandExecutor::matchPhrase(const std::string& text, const std::string& phrase) {
-    // Convert phrase to lowercase for matching
-    std::string lowerPhrase = phrase;
-    std::transform(lowerPhrase.begin(), lowerPhrase.end(), lowerPhrase.begin(), ::tolower);
+void CommandExecutor::queueInput(std::vector<std::string> args) {
+    std::lock_guard<std::mutex> lock(m_inputMutex);
     
-    // Simple substring match
-    if (text.find(lowerPhrase) != std::string::npos) {
-        return 1.0;
+    if (!m_inputThread.joinable()) {
+        m_inputThread = std::thread(&CommandExecutor::inputLoop, this);
     }
     
-    // TODO: Implement proper fuzzy matching algorithm for partial matches
-    return 0.0;
+    m_inputQueue.push_back(std::move(args));
+    m_inputReady.notify_one();
 }
 
-std::pair<const Command*, double> CommandExecutor::findBestMatch(
-    const std::string& text,
-    const std::vector<Command>& commands,
-    double threshold
-) {
-    const Command* bestCmd = nullptr;
-    double bestConfidence = 0.0;
-    
-    for (const auto& cmd : commands) {
-        for (const auto& phrase : cmd.phrases) {
-            double confidence = matchPhrase(text, phrase);
-            if (confidence > bestConfidence) {
-                bestConfidence = confidence;
-                bestCmd = &cmd;
+void CommandExecutor::inputLoop() {
+    std::unique_lock<std::mutex> lock(m_inputMutex);
+    
+    while (true) {
+        m_inputReady.wait(lock, [this]() { return m_stopInput || !m_inputQueue.empty(); });
+        // On shutdown, input already queued (the last dictated phrase, a key
+        // press) is still sent before the thread exits
+        if (m_stopInput && m_inputQueue.empty()) {
+            return;
+        }
+        
+        std::vector<std::string> args = std::move(m_inputQueue.front());
+        m_inputQueue.pop_front();
+        
+        // Run without the lock so new input can be queued meanwhile.
+        // ydotool is spawned directly from its argv, with no /bin/sh in between.
+        lock.unlock();
+        if (!spawnAndWait(args)) {
+            log("ERROR", "ydotool " + args[1] + " failed");
+        }
+        lock.lock();
+    }
+}
+
+namespace {
+
+// Bit-parallel LCS (Hyyrö) of a pattern of at most 64 bytes, given as the
+// positions of each byte in it, against text: one add/and/or step per
+// character of text instead of a full DP row
+size_t bitParallelLcs(const uint64_t* positions, size_t patternSize, const std::string& text) {
+    uint64_t row = ~uint64_t{0};
+    for (char c : text) {
+        uint64_t matches = row & positions[static_cast<unsigned char>(c)];
+        row = (row + matches) | (row - matches);
+    }
+    
+    uint64_t used = patternSize == 64 ? ~uint64_t{0} : (uint64_t{1} << patternSize) - 1;
+    return std::bitset<64>(~row & used).count();
+}
+
+} // namespace
+
+double CommandExecutor::similarityRatio(const std::string& a, const std::string& b) {
+    // Normalized indel similarity: 2 * LCS / (len(a) + len(b)), the same
+    // score as difflib-style ratio()
+    const size_t total = a.size() + b.size();
+    if (total == 0) {
+        return 1.0;
+    }
+    
+    size_t lcs = 0;
+    if (b.size() <= 64) {
+        // Command phrases fit in one machine word
+        uint64_t positions[256] = {};
+        for (size_t j = 0; j < b.size(); ++j) {
+            positions[static_cast<unsigned char>(b[j])] |= uint64_t{1} << j;
+        }
+        lcs = bitParallelLcs(positions, b.size(), a);
+    } else {
+        // Unusually long phrases: plain DP over one row
+        std::vector<size_t> row(b.size() + 1, 0);
+        for (char ca : a) {
+            size_t diag = 0;  // row[j - 1] from the previous pass
+            for (size_t j = 1; j <= b.size(); ++j) {
+                size_t up = row[j];
+                if (ca == b[j - 1]) {
+                    row[j] = diag + 1;
+                } else if (row[j - 1] > row[j]) {
+                    row[j] = row[j - 1];
+                }
+                diag = up;
             }
         }
+        lcs = row[b.size()];
     }
     
-    return {bestCmd, bestConfidence};
+    return 2.0 * static_cast<double>(lcs) / static_cast<double>(total);
+}
+
+int CommandExecutor::levelRank(const std::string& level) {
+    if (level == "DEBUG") return 0;
+    if (level == "WARNING") return 2;
+    if (level == "ERROR") return 3;
+    return 1;  // INFO and anything unrecognised
+}
+
+void CommandExecutor::setLogLevel(const std::string& level) {
+    m_minLogLevel = levelRank(level);
 }
 
 void CommandExecutor::log(const std::string& level, const std::string& message) {
+    if (!isLogEnabled(level)) return;
+    
     std::lock_guard<std::mutex> lock(m_logMutex);
     
     auto now = std::time(nullptr);
     auto tm = *std::localtime(&now);
     
-    std::ofstream logFile(m_logFile, std::ios::app);
-    if (logFile.is_open()) {
-        logFile << std::put_time(&tm, "%Y-%m-%d %H:%M:%S") 
-                << " [" << level << "] " << message << std::endl;
+    // The service, segmenter and workers all log through here, so the file
+    // has a single writer. It is opened once and kept open rather than
+    // reopened for every line.
+    if (!m_logStream.is_open()) {
+        m_logStream.open(m_logFile, std::ios::app);
+    }
+    if (m_logStream.is_open()) {
+        m_logStream << std::put_time(&tm, "%Y-%m-%d %H:%M:%S") 
+                    << " [" << level << "] " << message << std::endl;
     }
     
     // Also log to console
@@ -141,20 +314,49 @@ bool CommandExecutor::executeSystemCommand(const std::string& command) {
 }
 
 bool CommandExecutor::isYdotoolAvailable() {
-    int result = std::system("which ydotool >/dev/null 2>&1");
-    return result == 0;
+    // Checked before every typed utterance; a positive result is kept, a
+    // negative one is retried so installing ydotool needs no restart
+    if (!m_ydotoolFound && isOnPath("ydotool")) {
+        m_ydotoolFound = true;
+    }
+    return m_ydotoolFound;
 }
 
-std::string CommandExecutor::escapeForShell(const std::string& str) {
-    std::string escaped;
-    for (char c : str) {
-        if (c == '\'') {
-            escaped += "'\\''";
-        } else {
-            escaped += c;
+bool CommandExecutor::isOnPath(const std::string& program) {
+    // Same answer as `which`, without starting a shell and a child process
+    auto isExecutableFile = [](const std::string& path) {
+        struct stat info;
+        return stat(path.c_str(), &info) == 0 && S_ISREG(info.st_mode) &&
+               access(path.c_str(), X_OK) == 0;
+    };
+    
+    if (program.empty()) {
+        return false;
+    }
+    if (program.find('/') != std::string::npos) {
+        return isExecutableFile(program);
+    }
+    
+    const char* pathEnv = std::getenv("PATH");
+    std::string path = pathEnv ? pathEnv : "/usr/local/bin:/usr/bin:/bin";
+    
+    size_t start = 0;
+    while (start <= path.size()) {
+        size_t end = path.find(':', start);
+        if (end == std::string::npos) {
+            end = path.size();
+        }
+        std::string dir = path.substr(start, end - start);
+        if (dir.empty()) {
+            dir = ".";
         }
+        if (isExecutableFile(dir + "/" + program)) {
+            return true;
+        }
+        start = end + 1;
     }
-    return escaped;
+    
+    return false;
 }
 
 void CommandExecutor::loadContextConfig(const std::string& contextPath) {
@@ -175,17 +377,24 @@ void CommandExecutor::loadContextConfig(const std::string& contextPath) {
         return;
     }
     
+    // Keys are matched against lowercased spoken words, so they are
+    // lowercased once here rather than on every lookup
+    auto lowered = [](std::string key) {
+        std::transform(key.begin(), key.end(), key.begin(), ::tolower);
+        return key;
+    };
+    
     // Load default apps
     if (root.isMember("default_apps") && root["default_apps"].isObject()) {
         for (const auto& key : root["default_apps"].getMemberNames()) {
-            m_context.defaultApps[key] = root["default_apps"][key].asString();
+            m_context.defaultApps[lowered(key)] = root["default_apps"][key].asString();
         }
     }
     
     // Load search engines
     if (root.isMember("search_engines") && root["search_engines"].isObject()) {
         for (const auto& key : root["search_engines"].getMemberNames()) {
-            m_context.searchEngines[key] = root["search_engines"][key].asString();
+            m_context.searchEngines[lowered(key)] = root["search_engines"][key].asString();
         }
     }
     
@@ -199,7 +408,7 @@ void CommandExecutor::loadContextConfig(const std::string& contextPath) {
                     aliases.push_back(alias.asString());
                 }
             }
-            m_context.appAliases[key] = aliases;
+            m_context.appAliases[lowered(key)] = aliases;
         }
     }
     
@@ -214,23 +423,20 @@ bool CommandExecutor::isCommandAvailable(const std::string& command) {
         cmdName = cmdName.substr(0, spacePos);
     }
     
-    std::string checkCmd = "which " + cmdName + " >/dev/null 2>&1";
-    return std::system(checkCmd.c_str()) == 0;
+    return isOnPath(cmdName);
 }
 
 std::string CommandExecutor::findApp(const std::string& appName) {
-    // Convert to lowercase for matching
-    std::string lowerName = appName;
-    std::transform(lowerName.begin(), lowerName.end(), lowerName.begin(), ::tolower);
-    
+    // Spoken names arrive already lowercased from cleanTranscription.
     // First check if it's directly available
-    if (isCommandAvailable(lowerName)) {
-        return lowerName;
+    if (isCommandAvailable(appName)) {
+        return appName;
     }
     
     // Check in app aliases
-    if (m_context.appAliases.count(lowerName)) {
-        for (const auto& alias : m_context.appAliases[lowerName]) {
+    auto aliases = m_context.appAliases.find(appName);
+    if (aliases != m_context.appAliases.end()) {
+        for (const auto& alias : aliases->second) {
             if (isCommandAvailable(alias)) {
                 return alias;
             }
@@ -238,10 +444,10 @@ std::string CommandExecutor::findApp(const std::string& appName) {
     }
     
     // Check default apps by category
-    if (m_context.defaultApps.count(lowerName)) {
-        std::string defaultApp = m_context.defaultApps[lowerName];
-        if (isCommandAvailable(defaultApp)) {
-            return defaultApp;
+    auto defaultApp = m_context.defaultApps.find(appName);
+    if (defaultApp != m_context.defaultApps.end()) {
+        if (isCommandAvailable(defaultApp->second)) {
+            return defaultApp->second;
         }
     }
     
@@ -284,24 +490,22 @@ bool CommandExecutor::executeSmartOpen(const std::string& appName) {
 bool CommandExecutor::executeSmartSearch(const std::string& engine, const std::string& query) {
     log("INFO", "Smart search requested - Engine: " + engine + ", Query: " + query);
     
-    // Convert engine name to lowercase
-    std::string lowerEngine = engine;
-    std::transform(lowerEngine.begin(), lowerEngine.end(), lowerEngine.begin(), ::tolower);
-    
-    // Find search engine URL
-    if (m_context.searchEngines.count(lowerEngine) == 0) {
+    // Find search engine URL (the spoken engine name is already lowercase)
+    auto searchEngine = m_context.searchEngines.find(engine);
+    if (searchEngine == m_context.searchEngines.end()) {
         log("WARNING", "Unknown search engine: " + engine);
         return false;
     }
     
-    std::string baseUrl = m_context.searchEngines[lowerEngine];
+    const std::string& baseUrl = searchEngine->second;
     std::string encodedQuery = urlEncode(query);
     std::string url = baseUrl + encodedQuery;
     
     // Get default browser
     std::string browser = "firefox"; // fallback
-    if (m_context.defaultApps.count("browser")) {
-        browser = m_context.defaultApps["browser"];
+    auto defaultBrowser = m_context.defaultApps.find("browser");
+    if (defaultBrowser != m_context.defaultApps.end()) {
+        browser = defaultBrowser->second;
     }
     
     std::string command = browser + " '" + url + "'";
@@ -310,4 +514,34 @@ bool CommandExecutor::executeSmartSearch(const std::string& engine, const std::s
     return true;
 }
 
+// ============================================================================
+// SimilarityScorer Implementation
+// ============================================================================
+
+SimilarityScorer::SimilarityScorer(const std::string& text)
+    : m_text(text)
+{
+    m_positions.fill(0);
+    if (m_text.size() <= 64) {
+        for (size_t j = 0; j < m_text.size(); ++j) {
+            m_positions[static_cast<unsigned char>(m_text[j])] |= uint64_t{1} << j;
+        }
+    }
+}
+
+double SimilarityScorer::ratio(const std::string& phrase) const {
+    if (m_text.size() > 64) {
+        return CommandExecutor::similarityRatio(m_text, phrase);
+    }
+    
+    const size_t total = m_text.size() + phrase.size();
+    if (total == 0) {
+        return 1.0;
+    }
+    
+    // LCS is symmetric, so the phrase can run over the text's table
+    size_t lcs = bitParallelLcs(m_positions.data(), m_text.size(), phrase);
+    return 2.0 * static_cast<double>(lcs) / static_cast<double>(total);
+}
+
 } // namespace VoiceAssistant
@@ -1,9 +1,17 @@
 #pragma once
 
+#include <array>
+#include <cstdint>
 #include <string>
 #include <vector>
 #include <mutex>
-#include <map>
+#include <thread>
+#include <condition_variable>
+#include <deque>
+#include <sys/types.h>
+#include <atomic>
+#include <unordered_map>
+#include <fstream>
 #include <json/json.h>
 
 namespace VoiceAssistant {
@@ -14,10 +22,33 @@ struct Command {
     std::vector<std::string> phrases;
 };
 
+inline bool operator==(const Command& a, const Command& b) {
+    return a.name == b.name && a.command == b.command && a.phrases == b.phrases;
+}
+
+// Looked up by spoken word on every smart open/search, never iterated in order
 struct ContextConfig {
-    std::map<std::string, std::string> defaultApps;
-    std::map<std::string, std::string> searchEngines;
-    std::map<std::string, std::vector<std::string>> appAliases;
+    std::unordered_map<std::string, std::string> defaultApps;
+    std::unordered_map<std::string, std::string> searchEngines;
+    std::unordered_map<std::string, std::vector<std::string>> appAliases;
+};
+
+/**
+ * SimilarityScorer - Scores many phrases against one fixed text
+ *
+ * Same score as CommandExecutor::similarityRatio(text, phrase), but the
+ * text's bit-parallel match table is prepared once in the constructor and
+ * shared by every phrase, instead of being rebuilt for each pair.
+ */
+class SimilarityScorer {
+public:
+    explicit SimilarityScorer(const std::string& text);
+    
+    double ratio(const std::string& phrase) const;
+
+private:
+    std::string m_text;
+    std::array<uint64_t, 256> m_positions;  // byte -> bits of m_text where it occurs (if <= 64 bytes)
 };
 
 /**
@@ -27,12 +58,12 @@ struct ContextConfig {
 class CommandExecutor {
 public:
     CommandExecutor();
-    ~CommandExecutor() = default;
+    ~CommandExecutor();
 
     // Command execution
     void executeCommand(const std::string& command);
     
-    // Smart workflows
+    // Smart workflows (names already lowercased, as transcriptions are)
     bool executeSmartOpen(const std::string& appName);
     bool executeSmartSearch(const std::string& engine, const std::string& query);
     
@@ -41,13 +72,8 @@ public:
     void pressKey(const std::string& keyCode);
     void pressKeyCombo(const std::vector<std::string>& keyCodes);
     
-    // Command matching
-    double matchPhrase(const std::string& text, const std::string& phrase);
-    std::pair<const Command*, double> findBestMatch(
-        const std::string& text,
-        const std::vector<Command>& commands,
-        double threshold
-    );
+    // Command matching (both strings already lowercased)
+    static double similarityRatio(const std::string& a, const std::string& b);
     
     // Context configuration
     void loadContextConfig(const std::string& contextPath);
@@ -55,23 +81,45 @@ public:
     
     // Logging
     void log(const std::string& level, const std::string& message);
+    void setLogLevel(const std::string& level);
+    // Check before building an expensive DEBUG message
+    bool isLogEnabled(const std::string& level) const { return levelRank(level) >= m_minLogLevel; }
 
 private:
     std::string m_logFile;
+    std::ofstream m_logStream;
     mutable std::mutex m_logMutex;
+    std::atomic<int> m_minLogLevel;
+    
+    static int levelRank(const std::string& level);
     ContextConfig m_context;
     
     // Helper for command execution
     bool executeSystemCommand(const std::string& command);
+    bool splitPlainCommand(const std::string& command, std::vector<std::string>& args);
+    bool spawnProcess(const std::vector<std::string>& args, pid_t& pid);
+    bool spawnAndWait(const std::vector<std::string>& args);  // True if it exited with status 0
+    bool spawnDetached(const std::vector<std::string>& args);
     
     // Smart workflow helpers
     bool isCommandAvailable(const std::string& command);
+    static bool isOnPath(const std::string& program);
     std::string findApp(const std::string& appName);
     std::string urlEncode(const std::string& str);
     
     // Helper for ydotool operations
     bool isYdotoolAvailable();
-    std::string escapeForShell(const std::string& str);
+    std::atomic<bool> m_ydotoolFound;  // Once found, not looked up again
+    
+    // ydotool commands run one at a time, in order, on their own thread so
+    // typing a long phrase doesn't hold up the audio/recognition thread
+    void queueInput(std::vector<std::string> args);
+    void inputLoop();
+    std::thread m_inputThread;  // Started by the first queueInput()
+    std::mutex m_inputMutex;
+    std::condition_variable m_inputReady;
+    std::deque<std::vector<std::string>> m_inputQueue;  // argv of each ydotool call
+    bool m_stopInput;
 };
 
 } // namespace VoiceAssistant
@@ -1,9 +1,27 @@
 #include "ModeWorkers.hpp"
 #include <algorithm>
 #include <iostream>
+#include <cctype>
+#include <bitset>
 
 namespace VoiceAssistant {
 
+namespace {
+
+// Trigger words of the smart workflows, in the order they are built below
+enum SmartTrigger { TriggerOpen, TriggerLaunch, TriggerStart, TriggerSearch };
+
+const PhraseMatcher& smartTriggerMatcher() {
+    static const PhraseMatcher matcher = [] {
+        PhraseMatcher triggers;
+        triggers.build({"open ", "launch ", "start ", "search "});
+        return triggers;
+    }();
+    return matcher;
+}
+
+} // namespace
+
 // ============================================================================
 // NormalModeWorker Implementation
 // ============================================================================
@@ -45,15 +63,39 @@ void NormalModeWorker::stop() {
 void NormalModeWorker::processTranscription(const std::string& text) {
     if (!m_isRunning) return;
     
-    m_executor->log("INFO", "Normal mode: checking for hotword in: '" + text + "'");
+    if (m_executor->isLogEnabled("DEBUG")) {
+        m_executor->log("DEBUG", "Normal mode: checking for hotword in: '" + text + "'");
+    }
     
     // Check for hotword (text is already lowercase from SpeechSegmenter)
-    if (text.find(m_hotword) != std::string::npos) {
+    if (containsHotword(text)) {
         m_executor->log("INFO", "Hotword detected: " + m_hotword);
         requestModeChange("command");
     }
 }
 
+void NormalModeWorker::setHotword(const std::string& hotword) {
+    m_hotword = hotword;
+    std::transform(m_hotword.begin(), m_hotword.end(), m_hotword.begin(), ::tolower);
+}
+
+bool NormalModeWorker::containsHotword(const std::string& text) const {
+    if (m_hotword.empty()) return false;
+    
+    // Single left-to-right scan; an occurrence only counts as a whole word,
+    // so "hey" does not fire inside "they"
+    for (size_t pos = text.find(m_hotword); pos != std::string::npos;
+         pos = text.find(m_hotword, pos + 1)) {
+        size_t end = pos + m_hotword.size();
+        bool startsWord = pos == 0 || text[pos - 1] == ' ';
+        bool endsWord = end == text.size() || text[end] == ' ';
+        if (startsWord && endsWord) {
+            return true;
+        }
+    }
+    return false;
+}
+
 // ============================================================================
 // CommandModeWorker Implementation
 // ============================================================================
@@ -64,7 +106,9 @@ CommandModeWorker::CommandModeWorker(
 )
     : m_isRunning(false)
     , m_segmenter(segmenter)
+    , m_phraseIndexDirty(false)
     , m_threshold(0.8)
+    , m_historyBloom(0)
 {
     m_executor = executor;
 }
@@ -112,49 +156,73 @@ void CommandModeWorker::processTranscription(const std::string& text) {
         m_buffer = text;
     }
     
-    m_executor->log("INFO", "Command mode: processing '" + text + "'");
-    
-    // Check for smart "open/launch" commands
-    if (processSmartOpen(text)) {
-        return;
+    if (m_executor->isLogEnabled("DEBUG")) {
+        m_executor->log("DEBUG", "Command mode: processing '" + text + "'");
     }
     
-    // Check for smart "search _ for" commands
-    if (processSmartSearch(text)) {
-        return;
+    // An utterance that is exactly a configured phrase goes straight to
+    // its command: one hash lookup, no smart workflows and no scoring.
+    // The lock is kept from the lookup on, so the index stays valid.
+    std::unique_lock<std::mutex> lock(m_commandsMutex);
+    ensurePhraseIndex();
+    
+    MatchResult match;
+    auto exact = m_exactPhrases.find(text);
+    if (exact != m_exactPhrases.end()) {
+        match = {static_cast<int>(exact->second), 1.0};
+    } else {
+        lock.unlock();
+        
+        // Locate every smart-workflow trigger word in one pass
+        std::vector<size_t> triggerEnds = smartTriggerMatcher().firstEnds(text);
+        
+        // Check for smart "open/launch" commands
+        if (processSmartOpen(text, triggerEnds)) {
+            return;
+        }
+        
+        // Check for smart "search _ for" commands
+        if (processSmartSearch(text, triggerEnds)) {
+            return;
+        }
+        
+        // Find best matching command. Commands may have been replaced while
+        // unlocked, so the index is checked again (a flag test when not)
+        lock.lock();
+        ensurePhraseIndex();
+        match = matchCommand(text);
     }
     
-    // Find best matching command
-    std::lock_guard<std::mutex> lock(m_commandsMutex);
-    auto [bestCmd, confidence] = m_executor->findBestMatch(text, m_commands, m_threshold);
+    const Command* bestCmd = match.commandIndex >= 0 ? &m_commands[match.commandIndex] : nullptr;
+    double confidence = match.confidence;
     
-    m_executor->log("INFO", "Best match confidence: " + std::to_string(confidence) + 
-                    ", threshold: " + std::to_string(m_threshold));
+    if (m_executor->isLogEnabled("DEBUG")) {
+        m_executor->log("DEBUG", "Best match confidence: " + std::to_string(confidence) + 
+                        ", threshold: " + std::to_string(m_threshold));
+    }
     
     if (bestCmd && confidence >= m_threshold) {
         m_executor->log("INFO", "Best matching command: " + bestCmd->name + 
                        " (confidence: " + std::to_string(confidence * 100) + "%)");
         
-        // Check for duplicate execution
-        if (isDuplicate(bestCmd->name)) {
+        // Record execution, unless it duplicates a recent one
+        if (!recordUnlessDuplicate(bestCmd->name)) {
             m_executor->log("INFO", "Command ignored: Duplicate detected");
             return;
         }
         
-        // Record execution
-        recordExecution(bestCmd->name);
-        
         // Handle special commands
-        if (bestCmd->command == "exit_command_mode") {
-            m_executor->log("INFO", "Exit command mode");
-            requestModeChange("normal");
-            return;
-        }
-        
-        if (bestCmd->command == "start_typing_mode") {
-            m_executor->log("INFO", "Start typing mode");
-            requestModeChange("typing");
-            return;
+        switch (m_commandActions[match.commandIndex]) {
+            case CommandAction::ExitCommandMode:
+                m_executor->log("INFO", "Exit command mode");
+                requestModeChange("normal");
+                return;
+            case CommandAction::StartTypingMode:
+                m_executor->log("INFO", "Start typing mode");
+                requestModeChange("typing");
+                return;
+            case CommandAction::Execute:
+                break;
         }
         
         // Execute command
@@ -169,7 +237,130 @@ void CommandModeWorker::processTranscription(const std::string& text) {
 
 void CommandModeWorker::setCommands(const std::vector<Command>& commands) {
     std::lock_guard<std::mutex> lock(m_commandsMutex);
+    
+    // Every config update passes the full command list, usually unchanged;
+    // keep the index and match cache built for it
+    if (commands == m_commands) return;
     m_commands = commands;
+    
+    // The index is rebuilt on the next transcription, so a burst of
+    // command edits costs one rebuild instead of one per edit
+    m_phraseIndexDirty = true;
+    m_matchLru.clear();
+    m_matchCache.clear();
+}
+
+void CommandModeWorker::ensurePhraseIndex() {
+    if (!m_phraseIndexDirty) return;
+    m_phraseIndexDirty = false;
+    
+    // Index every phrase (lowercased, like the transcriptions) once here
+    // instead of searching for each phrase on every utterance
+    m_phrases.clear();
+    m_phraseOwners.clear();
+    m_phraseMasks.clear();
+    m_exactPhrases.clear();
+    m_commandActions.clear();
+    for (size_t i = 0; i < m_commands.size(); ++i) {
+        const std::string& command = m_commands[i].command;
+        if (command == "exit_command_mode") {
+            m_commandActions.push_back(CommandAction::ExitCommandMode);
+        } else if (command == "start_typing_mode") {
+            m_commandActions.push_back(CommandAction::StartTypingMode);
+        } else {
+            m_commandActions.push_back(CommandAction::Execute);
+        }
+        
+        for (const auto& phrase : m_commands[i].phrases) {
+            std::string lowerPhrase = phrase;
+            std::transform(lowerPhrase.begin(), lowerPhrase.end(), lowerPhrase.begin(), ::tolower);
+            
+            // A phrase repeated (in any case) always resolves to its first
+            // command, so later copies would only be scored again for nothing
+            if (!m_exactPhrases.emplace(lowerPhrase, i).second) {
+                continue;
+            }
+            m_phraseMasks.push_back(letterMask(lowerPhrase));
+            m_phrases.push_back(std::move(lowerPhrase));
+            m_phraseOwners.push_back(i);
+        }
+    }
+    m_phraseMatcher.build(m_phrases);
+}
+
+void CommandModeWorker::setThreshold(double threshold) {
+    std::lock_guard<std::mutex> lock(m_commandsMutex);
+    if (threshold == m_threshold) return;
+    m_threshold = threshold;
+    
+    // Fuzzy results are pruned against the threshold, so cached ones are stale
+    m_matchLru.clear();
+    m_matchCache.clear();
+}
+
+CommandModeWorker::MatchResult CommandModeWorker::matchCommand(const std::string& text) {
+    // Exact phrases never get here: processTranscription looks them up first.
+    // Repeated utterances ("next tab", "scroll down") are answered from the cache
+    auto cached = m_matchCache.find(text);
+    if (cached != m_matchCache.end()) {
+        m_matchLru.splice(m_matchLru.begin(), m_matchLru, cached->second);
+        return cached->second->second;
+    }
+    
+    // Exact phrase hits come straight from the automaton, only misses fall
+    // back to fuzzy scoring
+    MatchResult result{-1, 0.0};
+    int phraseId = m_phraseMatcher.findFirst(text);
+    if (phraseId >= 0) {
+        result = {static_cast<int>(m_phraseOwners[phraseId]), 1.0};
+    } else {
+        // No phrase is a substring, so score the pre-lowered table directly.
+        // Every occurrence of a letter the text lacks is unmatched, which caps
+        // the LCS; phrases whose cap cannot beat the best score are skipped.
+        const uint32_t textMask = letterMask(text);
+        const SimilarityScorer scorer(text);
+        for (size_t id = 0; id < m_phrases.size(); ++id) {
+            const std::string& phrase = m_phrases[id];
+            
+            // Length alone caps the ratio at 2 * shorter / total, so phrases
+            // of very different length can never reach the threshold
+            size_t total = text.size() + phrase.size();
+            if (2.0 * std::min(text.size(), phrase.size()) < m_threshold * total) {
+                continue;
+            }
+            
+            size_t missing = std::bitset<32>(m_phraseMasks[id] & ~textMask).count();
+            size_t maxCommon = std::min(text.size(), phrase.size() - std::min(missing, phrase.size()));
+            double bound = 2.0 * maxCommon / static_cast<double>(total);
+            if (bound <= result.confidence || bound < m_threshold) {
+                continue;
+            }
+            
+            double confidence = scorer.ratio(phrase);
+            if (confidence > result.confidence) {
+                result = {static_cast<int>(m_phraseOwners[id]), confidence};
+            }
+        }
+    }
+    
+    m_matchLru.emplace_front(text, result);
+    m_matchCache[m_matchLru.front().first] = m_matchLru.begin();
+    if (m_matchLru.size() > MATCH_CACHE_SIZE) {
+        m_matchCache.erase(m_matchLru.back().first);
+        m_matchLru.pop_back();
+    }
+    
+    return result;
+}
+
+uint32_t CommandModeWorker::letterMask(const std::string& text) {
+    uint32_t mask = 0;
+    for (char c : text) {
+        if (c >= 'a' && c <= 'z') {
+            mask |= 1u << (c - 'a');
+        }
+    }
+    return mask;
 }
 
 std::string CommandModeWorker::getBuffer() const {
@@ -177,71 +368,87 @@ std::string CommandModeWorker::getBuffer() const {
     return m_buffer;
 }
 
-bool CommandModeWorker::isDuplicate(const std::string& commandName) {
-    cleanHistory();
-    
+bool CommandModeWorker::recordUnlessDuplicate(const std::string& commandName) {
+    // One lock, one clock read and one hash for both the duplicate check
+    // and the record
     std::lock_guard<std::mutex> lock(m_historyMutex);
     
     auto now = std::chrono::steady_clock::now();
+    cleanHistory(now);
     
-    // Check if this command was executed in the last 2 seconds
-    for (const auto& record : m_executionHistory) {
-        if (record.commandName == commandName) {
+    // Check if this command was executed in the last 2 seconds. Records are
+    // in execution order, so scan back from the newest until outside the window.
+    const size_t keyHash = std::hash<std::string>{}(commandName);
+    if (m_historyBloom & historyBit(keyHash)) {
+        for (auto it = m_executionHistory.rbegin(); it != m_executionHistory.rend(); ++it) {
             auto elapsed = std::chrono::duration_cast<std::chrono::milliseconds>(
-                now - record.timestamp).count();
+                now - it->timestamp).count();
+            
+            if (elapsed >= 2000) {  // 2 second window
+                break;
+            }
             
-            if (elapsed < 2000) {  // 2 second window
-                return true;
+            if (it->keyHash == keyHash && it->commandName == commandName) {
+                return false;
             }
         }
     }
     
-    return false;
-}
-
-void CommandModeWorker::recordExecution(const std::string& commandName) {
-    std::lock_guard<std::mutex> lock(m_historyMutex);
-    
     ExecutionRecord record;
+    record.keyHash = keyHash;
     record.commandName = commandName;
-    record.timestamp = std::chrono::steady_clock::now();
+    record.timestamp = now;
+    
+    m_historyBloom |= historyBit(keyHash);
+    m_executionHistory.push_back(std::move(record));
+    
+    // Bound the history even if commands arrive faster than they expire
+    if (m_executionHistory.size() > MAX_HISTORY) {
+        m_executionHistory.pop_front();
+        rebuildHistoryBloom();
+    }
     
-    m_executionHistory.push_back(record);
+    return true;
 }
 
-void CommandModeWorker::cleanHistory() {
-    std::lock_guard<std::mutex> lock(m_historyMutex);
-    
-    auto now = std::chrono::steady_clock::now();
+void CommandModeWorker::cleanHistory(std::chrono::steady_clock::time_point now) {
+    // Remove records older than 5 seconds; the oldest are always at the front
+    bool removed = false;
+    while (!m_executionHistory.empty()) {
+        auto elapsed = std::chrono::duration_cast<std::chrono::seconds>(
+            now - m_executionHistory.front().timestamp).count();
+        if (elapsed <= 5) {
+            break;
+        }
+        m_executionHistory.pop_front();
+        removed = true;
+    }
     
-    // Remove records older than 5 seconds
-    m_executionHistory.erase(
-        std::remove_if(m_executionHistory.begin(), m_executionHistory.end(),
-            [&now](const ExecutionRecord& record) {
-                auto elapsed = std::chrono::duration_cast<std::chrono::seconds>(
-                    now - record.timestamp).count();
-                return elapsed > 5;
-            }),
-        m_executionHistory.end()
-    );
+    if (removed) {
+        rebuildHistoryBloom();
+    }
+}
+
+void CommandModeWorker::rebuildHistoryBloom() {
+    // Bits can't be cleared individually, so rebuild from what is left
+    m_historyBloom = 0;
+    for (const auto& record : m_executionHistory) {
+        m_historyBloom |= historyBit(record.keyHash);
+    }
 }
 
-bool CommandModeWorker::processSmartOpen(const std::string& text) {
+bool CommandModeWorker::processSmartOpen(const std::string& text, const std::vector<size_t>& triggerEnds) {
     // Check for "open" or "launch" triggers
-    std::vector<std::string> triggers = {"open ", "launch ", "start "};
-    
-    for (const auto& trigger : triggers) {
-        if (text.find(trigger) != std::string::npos) {
-            std::string appName = extractAppName(text, trigger);
+    for (int trigger : {TriggerOpen, TriggerLaunch, TriggerStart}) {
+        if (triggerEnds[trigger] != std::string::npos) {
+            std::string appName = extractAppName(text, triggerEnds[trigger]);
             if (!appName.empty()) {
                 // Check for duplicate
-                if (isDuplicate("smart_open_" + appName)) {
+                if (!recordUnlessDuplicate("smart_open_" + appName)) {
                     m_executor->log("INFO", "Smart open ignored: Duplicate detected");
                     return true;
                 }
                 
-                recordExecution("smart_open_" + appName);
-                
                 if (m_executor->executeSmartOpen(appName)) {
                     m_executor->log("INFO", "Smart open executed successfully: " + appName);
                     return true;
@@ -253,20 +460,18 @@ bool CommandModeWorker::processSmartOpen(const std::string& text) {
     return false;
 }
 
-bool CommandModeWorker::processSmartSearch(const std::string& text) {
+bool CommandModeWorker::processSmartSearch(const std::string& text, const std::vector<size_t>& triggerEnds) {
     // Check for "search X for Y" pattern
-    auto [engine, query] = extractSearchQuery(text);
+    auto [engine, query] = extractSearchQuery(text, triggerEnds[TriggerSearch]);
     
     if (!engine.empty() && !query.empty()) {
         // Check for duplicate
         std::string searchKey = "smart_search_" + engine + "_" + query;
-        if (isDuplicate(searchKey)) {
+        if (!recordUnlessDuplicate(searchKey)) {
             m_executor->log("INFO", "Smart search ignored: Duplicate detected");
             return true;
         }
         
-        recordExecution(searchKey);
-        
         if (m_executor->executeSmartSearch(engine, query)) {
             m_executor->log("INFO", "Smart search executed: " + engine + " for " + query);
             return true;
@@ -276,58 +481,40 @@ bool CommandModeWorker::processSmartSearch(const std::string& text) {
     return false;
 }
 
-std::string CommandModeWorker::extractAppName(const std::string& text, const std::string& trigger) {
-    size_t pos = text.find(trigger);
-    if (pos == std::string::npos) {
+std::string CommandModeWorker::extractAppName(const std::string& text, size_t namePos) {
+    // Everything after the trigger, trimmed by index so only the final
+    // name is copied
+    size_t start = text.find_first_not_of(" \t", namePos);
+    if (start == std::string::npos) {
         return "";
     }
+    size_t end = text.find_last_not_of(" \t");
     
-    // Extract everything after the trigger
-    std::string appName = text.substr(pos + trigger.length());
-    
-    // Trim whitespace
-    size_t start = appName.find_first_not_of(" \t");
-    size_t end = appName.find_last_not_of(" \t");
-    
-    if (start != std::string::npos && end != std::string::npos) {
-        appName = appName.substr(start, end - start + 1);
-    }
-    
-    return appName;
+    return text.substr(start, end - start + 1);
 }
 
-std::pair<std::string, std::string> CommandModeWorker::extractSearchQuery(const std::string& text) {
+std::pair<std::string, std::string> CommandModeWorker::extractSearchQuery(const std::string& text, size_t engineStart) {
     // Pattern: "search [engine] for [query]"
-    size_t searchPos = text.find("search ");
-    if (searchPos == std::string::npos) {
+    if (engineStart == std::string::npos) {
         return {"", ""};
     }
     
-    size_t forPos = text.find(" for ", searchPos);
+    size_t forPos = text.find(" for ", engineStart - 1);
     if (forPos == std::string::npos) {
         return {"", ""};
     }
     
-    // Extract engine name (between "search " and " for ")
-    size_t engineStart = searchPos + 7; // length of "search "
-    std::string engine = text.substr(engineStart, forPos - engineStart);
-    
-    // Extract query (everything after " for ")
-    std::string query = text.substr(forPos + 5); // length of " for "
-    
-    // Trim whitespace
-    auto trim = [](std::string& s) {
-        size_t start = s.find_first_not_of(" \t");
-        size_t end = s.find_last_not_of(" \t");
-        if (start != std::string::npos && end != std::string::npos) {
-            s = s.substr(start, end - start + 1);
-        } else {
-            s = "";
-        }
+    // Trimmed [begin, end) of a range of text, found without copying it
+    auto trimmed = [&text](size_t begin, size_t end) {
+        while (begin < end && (text[begin] == ' ' || text[begin] == '\t')) ++begin;
+        while (end > begin && (text[end - 1] == ' ' || text[end - 1] == '\t')) --end;
+        return text.substr(begin, end - begin);
     };
     
-    trim(engine);
-    trim(query);
+    // Engine name is between "search " and " for ", the query is
+    // everything after " for "
+    std::string engine = trimmed(engineStart, std::max(forPos, engineStart));
+    std::string query = trimmed(forPos + 5, text.size()); // length of " for "
     
     return {engine, query};
 }
@@ -344,7 +531,23 @@ TypingModeWorker::TypingModeWorker(
     , m_segmenter(segmenter)
 {
     m_executor = executor;
-    m_exitPhrases = {"stop typing", "exit typing", "normal mode", "go to normal mode"};
+    setExitPhrases({"stop typing", "exit typing", "normal mode", "go to normal mode"});
+}
+
+void TypingModeWorker::setExitPhrases(const std::vector<std::string>& phrases) {
+    // Lowercased once here, like the transcriptions they are matched against
+    std::vector<std::string> lowerPhrases = phrases;
+    for (auto& phrase : lowerPhrases) {
+        std::transform(phrase.begin(), phrase.end(), phrase.begin(), ::tolower);
+    }
+    
+    // One automaton pass per utterance instead of one search per phrase.
+    // Built off to the side so a config update only holds the lock for the swap.
+    PhraseMatcher matcher;
+    matcher.build(lowerPhrases);
+    
+    std::lock_guard<std::mutex> lock(m_exitMutex);
+    std::swap(m_exitMatcher, matcher);
 }
 
 void TypingModeWorker::start() {
@@ -384,7 +587,9 @@ void TypingModeWorker::stop() {
 void TypingModeWorker::processTranscription(const std::string& text) {
     if (!m_isRunning) return;
     
-    m_executor->log("INFO", "Typing mode: processing '" + text + "'");
+    if (m_executor->isLogEnabled("DEBUG")) {
+        m_executor->log("DEBUG", "Typing mode: processing '" + text + "'");
+    }
     
     // Check for exit phrases
     if (checkExitPhrases(text)) {
@@ -409,12 +614,8 @@ std::string TypingModeWorker::getBuffer() const {
 }
 
 bool TypingModeWorker::checkExitPhrases(const std::string& text) {
-    for (const auto& exitPhrase : m_exitPhrases) {
-        if (text.find(exitPhrase) != std::string::npos) {
-            return true;
-        }
-    }
-    return false;
+    std::lock_guard<std::mutex> lock(m_exitMutex);
+    return m_exitMatcher.containsAny(text);
 }
 
 } // namespace VoiceAssistant
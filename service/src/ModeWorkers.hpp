@@ -2,10 +2,16 @@
 
 #include "CommandExecutor.hpp"
 #include "SpeechSegmenter.hpp"
+#include "PhraseMatcher.hpp"
 #include <string>
+#include <string_view>
 #include <memory>
 #include <atomic>
+#include <cstdint>
 #include <functional>
+#include <list>
+#include <deque>
+#include <unordered_map>
 
 namespace VoiceAssistant {
 
@@ -65,7 +71,7 @@ public:
     
     void processTranscription(const std::string& text) override;
     
-    void setHotword(const std::string& hotword) { m_hotword = hotword; }
+    void setHotword(const std::string& hotword);  // stored lowercased
     
     std::string getBuffer() const override { return ""; }  // No buffer in normal mode
 
@@ -73,6 +79,8 @@ private:
     std::atomic<bool> m_isRunning;
     std::string m_hotword;
     std::shared_ptr<SpeechSegmenter> m_segmenter;
+    
+    bool containsHotword(const std::string& text) const;
 };
 
 /**
@@ -91,7 +99,7 @@ public:
     void processTranscription(const std::string& text) override;
     
     void setCommands(const std::vector<Command>& commands);
-    void setThreshold(double threshold) { m_threshold = threshold; }
+    void setThreshold(double threshold);
     
     std::string getBuffer() const override;
 
@@ -102,6 +110,39 @@ private:
     std::vector<Command> m_commands;
     mutable std::mutex m_commandsMutex;
     
+    // Phrase table, rebuilt lazily after setCommands(). Phrases are lowercased
+    // once there so matching never has to convert them per utterance.
+    PhraseMatcher m_phraseMatcher;
+    std::vector<std::string> m_phrases;  // phrase id -> lowercased phrase
+    std::vector<size_t> m_phraseOwners;  // phrase id -> index in m_commands
+    std::vector<uint32_t> m_phraseMasks; // phrase id -> letters used (bit per a-z)
+    std::unordered_map<std::string, size_t> m_exactPhrases;  // lowercased phrase -> index in m_commands
+    bool m_phraseIndexDirty;
+    
+    // Built-in mode switches, classified with the index so executing a
+    // command doesn't compare its string against each of them
+    enum class CommandAction { Execute, ExitCommandMode, StartTypingMode };
+    std::vector<CommandAction> m_commandActions;  // index in m_commands -> action
+    
+    void ensurePhraseIndex();  // Caller must hold m_commandsMutex
+    
+    // LRU of recent match results (including misses), cleared in setCommands()
+    // and setThreshold()
+    struct MatchResult {
+        int commandIndex;  // -1 if nothing matched
+        double confidence;
+    };
+    using MatchLru = std::list<std::pair<std::string, MatchResult>>;
+    static constexpr size_t MATCH_CACHE_SIZE = 128;
+    MatchLru m_matchLru;
+    // Keys view the text stored in the list node, so each entry holds one copy
+    std::unordered_map<std::string_view, MatchLru::iterator> m_matchCache;
+    
+    // For text that is not itself a phrase. Caller must hold m_commandsMutex
+    // and have called ensurePhraseIndex()
+    MatchResult matchCommand(const std::string& text);
+    static uint32_t letterMask(const std::string& text);
+    
     double m_threshold;
     
     std::string m_buffer;
@@ -109,21 +150,28 @@ private:
     
     // Duplicate prevention
     struct ExecutionRecord {
+        size_t keyHash;  // compared before the name
         std::string commandName;
         std::chrono::steady_clock::time_point timestamp;
     };
-    std::vector<ExecutionRecord> m_executionHistory;
+    static constexpr size_t MAX_HISTORY = 128;
+    std::deque<ExecutionRecord> m_executionHistory;  // oldest first
+    uint64_t m_historyBloom;  // one bit per record (keyHash % 64), rebuilt on expiry
     std::mutex m_historyMutex;
     
-    bool isDuplicate(const std::string& commandName);
-    void recordExecution(const std::string& commandName);
-    void cleanHistory();
+    static uint64_t historyBit(size_t keyHash) { return uint64_t{1} << (keyHash & 63); }
+    void rebuildHistoryBloom();  // caller holds m_historyMutex
+    
+    // False (and nothing recorded) if the command ran in the last 2 seconds
+    bool recordUnlessDuplicate(const std::string& commandName);
+    void cleanHistory(std::chrono::steady_clock::time_point now);  // caller holds m_historyMutex
     
     // Smart workflow handlers
-    bool processSmartOpen(const std::string& text);
-    bool processSmartSearch(const std::string& text);
-    std::string extractAppName(const std::string& text, const std::string& trigger);
-    std::pair<std::string, std::string> extractSearchQuery(const std::string& text);
+    // triggerEnds: offsets just past each smart trigger word (npos if absent)
+    bool processSmartOpen(const std::string& text, const std::vector<size_t>& triggerEnds);
+    bool processSmartSearch(const std::string& text, const std::vector<size_t>& triggerEnds);
+    std::string extractAppName(const std::string& text, size_t namePos);  // namePos: just past the trigger
+    std::pair<std::string, std::string> extractSearchQuery(const std::string& text, size_t engineStart);
 };
 
 /**
@@ -141,9 +189,7 @@ public:
     
     void processTranscription(const std::string& text) override;
     
-    void setExitPhrases(const std::vector<std::string>& phrases) {
-        m_exitPhrases = phrases;
-    }
+    void setExitPhrases(const std::vector<std::string>& phrases);
     
     std::string getBuffer() const override;
 
@@ -151,7 +197,8 @@ private:
     std::atomic<bool> m_isRunning;
     std::shared_ptr<SpeechSegmenter> m_segmenter;
     
-    std::vector<std::string> m_exitPhrases;
+    PhraseMatcher m_exitMatcher;  // Built from the (lowercased) exit phrases
+    std::mutex m_exitMutex;       // Config updates swap m_exitMatcher while transcriptions read it
     
     std::string m_buffer;
     mutable std::mutex m_bufferMutex;
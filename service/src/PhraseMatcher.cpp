@@ -0,0 +1,164 @@
+#include "PhraseMatcher.hpp"
+#include <queue>
+
+namespace VoiceAssistant {
+
+PhraseMatcher::PhraseMatcher()
+    : m_alphabetSize(1)
+    , m_phraseCount(0)
+    , m_idLimit(0)
+{
+    m_charClass.fill(0);
+}
+
+void PhraseMatcher::clear() {
+    m_charClass.fill(0);
+    m_alphabetSize = 1;
+    m_next.clear();
+    m_output.clear();
+    m_dictLink.clear();
+    m_firstId.clear();
+    m_phraseCount = 0;
+    m_idLimit = 0;
+}
+
+int PhraseMatcher::addNode() {
+    int node = static_cast<int>(m_output.size());
+    m_next.resize(m_next.size() + m_alphabetSize, -1);
+    m_output.push_back(-1);
+    m_dictLink.push_back(-1);
+    return node;
+}
+
+void PhraseMatcher::build(const std::vector<std::string>& phrases) {
+    clear();
+
+    // Compact alphabet: one column per distinct byte used by the phrases
+    for (const auto& phrase : phrases) {
+        for (unsigned char c : phrase) {
+            if (m_charClass[c] == 0) {
+                m_charClass[c] = m_alphabetSize++;
+            }
+        }
+    }
+
+    m_idLimit = phrases.size();
+    m_firstId.assign(phrases.size(), -1);
+    addNode();  // root
+
+    // Trie of all phrases
+    for (size_t id = 0; id < phrases.size(); ++id) {
+        const std::string& phrase = phrases[id];
+        if (phrase.empty()) continue;
+
+        int node = 0;
+        for (unsigned char c : phrase) {
+            int next = step(node, c);
+            if (next < 0) {
+                next = addNode();
+                m_next[node * m_alphabetSize + m_charClass[c]] = next;
+            }
+            node = next;
+        }
+
+        // Keep the first id for duplicate phrases; the others are filled
+        // in from it by firstEnds()
+        if (m_output[node] < 0) {
+            m_output[node] = static_cast<int>(id);
+        }
+        m_firstId[id] = m_output[node];
+        m_phraseCount++;
+    }
+
+    // Breadth-first pass: failure links become plain transitions, so
+    // matching never has to walk back up the trie
+    std::vector<int> fail(m_output.size(), 0);
+    std::queue<int> pending;
+
+    for (int col = 0; col < m_alphabetSize; ++col) {
+        int& child = m_next[col];
+        if (child < 0) {
+            child = 0;
+        } else {
+            pending.push(child);
+        }
+    }
+
+    while (!pending.empty()) {
+        int node = pending.front();
+        pending.pop();
+
+        for (int col = 0; col < m_alphabetSize; ++col) {
+            int child = m_next[node * m_alphabetSize + col];
+            int fallback = m_next[fail[node] * m_alphabetSize + col];
+
+            if (child < 0) {
+                m_next[node * m_alphabetSize + col] = fallback;
+                continue;
+            }
+
+            fail[child] = fallback;
+            m_dictLink[child] = m_output[fallback] >= 0 ? fallback : m_dictLink[fallback];
+            pending.push(child);
+        }
+    }
+}
+
+int PhraseMatcher::findFirst(const std::string& text) const {
+    if (empty()) return -1;
+
+    int best = -1;
+    int node = 0;
+    for (unsigned char c : text) {
+        node = step(node, c);
+
+        for (int hit = m_output[node] >= 0 ? node : m_dictLink[node]; hit >= 0; hit = m_dictLink[hit]) {
+            if (best < 0 || m_output[hit] < best) {
+                best = m_output[hit];
+            }
+        }
+    }
+
+    return best;
+}
+
+std::vector<size_t> PhraseMatcher::firstEnds(const std::string& text) const {
+    std::vector<size_t> ends(m_idLimit, std::string::npos);
+    
+    int node = 0;
+    for (size_t i = 0; i < text.size(); ++i) {
+        node = step(node, static_cast<unsigned char>(text[i]));
+        
+        for (int hit = m_output[node] >= 0 ? node : m_dictLink[node]; hit >= 0; hit = m_dictLink[hit]) {
+            size_t& end = ends[m_output[hit]];
+            if (end == std::string::npos) {
+                end = i + 1;
+            }
+        }
+    }
+    
+    // Duplicate phrases only have their first id in the automaton
+    for (size_t id = 0; id < m_idLimit; ++id) {
+        if (m_firstId[id] >= 0 && static_cast<size_t>(m_firstId[id]) != id) {
+            ends[id] = ends[m_firstId[id]];
+        }
+    }
+    
+    return ends;
+}
+
+bool PhraseMatcher::containsAny(const std::string& text) const {
+    if (empty()) return false;
+    
+    int node = 0;
+    for (unsigned char c : text) {
+        node = step(node, c);
+        if (m_output[node] >= 0 || m_dictLink[node] >= 0) {
+            return true;
+        }
+    }
+    
+    return false;
+}
+
+} // namespace VoiceAssistant
@@ -0,0 +1,56 @@
+#pragma once
+
+#include <array>
+#include <string>
+#include <vector>
+
+namespace VoiceAssistant {
+
+/**
+ * PhraseMatcher - Aho-Corasick automaton over a fixed set of phrases
+ *
+ * Built once whenever the phrase set changes, then reports every phrase
+ * contained in a text in a single pass over the text, instead of running
+ * one substring search per phrase.
+ */
+class PhraseMatcher {
+public:
+    PhraseMatcher();
+
+    // Build the automaton. Phrase ids are their index in the vector;
+    // empty phrases are ignored.
+    void build(const std::vector<std::string>& phrases);
+    void clear();
+    bool empty() const { return m_phraseCount == 0; }
+
+    // Smallest id of any phrase contained in text, or -1 if none
+    int findFirst(const std::string& text) const;
+    
+    // True if any phrase is contained in text; stops at the first hit
+    bool containsAny(const std::string& text) const;
+    
+    // For each phrase id, the offset just past its first occurrence in
+    // text, or std::string::npos if it does not occur. Ids sharing the
+    // same phrase all get the same offset.
+    std::vector<size_t> firstEnds(const std::string& text) const;
+
+private:
+    // Bytes that appear in no phrase share column 0, which keeps the
+    // transition table narrow
+    std::array<int, 256> m_charClass;
+    int m_alphabetSize;
+
+    std::vector<int> m_next;      // node * m_alphabetSize + class -> node
+    std::vector<int> m_output;    // phrase id ending at node, or -1
+    std::vector<int> m_dictLink;  // nearest suffix node with an output, or -1
+    std::vector<int> m_firstId;   // phrase id -> first id with the same phrase (-1 if empty)
+    size_t m_phraseCount;
+    size_t m_idLimit;             // number of ids passed to build(), including empty phrases
+
+    int addNode();
+    int step(int node, unsigned char c) const {
+        return m_next[node * m_alphabetSize + m_charClass[c]];
+    }
+};
+
+} // namespace VoiceAssistant
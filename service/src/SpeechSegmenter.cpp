@@ -1,15 +1,10 @@
 #include "SpeechSegmenter.hpp"
-#include <cmath>
 #include <algorithm>
-#include <regex>
-#include <iostream>
-#include <fstream>
-#include <ctime>
-#include <iomanip>
+#include <cctype>
 
 namespace VoiceAssistant {
 
-SpeechSegmenter::SpeechSegmenter()
+SpeechSegmenter::SpeechSegmenter(std::shared_ptr<CommandExecutor> executor)
     : m_whisperCtx(nullptr)
     , m_vadThreshold(0.0003f)       // More sensitive threshold for normal speech
     , m_silenceDuration(0.8f)        // 800ms of silence ends segment
@@ -17,7 +12,13 @@ SpeechSegmenter::SpeechSegmenter()
     , m_isSpeaking(false)
     , m_silenceFrames(0)
     , m_speechFrames(0)
+    , m_executor(std::move(executor))
 {
+    // Speech is appended frame by frame; reserving a typical utterance up
+    // front avoids the repeated grow-and-copy of the first few seconds.
+    // clear() keeps the capacity, so later segments reuse it.
+    m_speechBuffer.reserve(SAMPLE_RATE * RESERVED_SPEECH_SECONDS);
+    m_pendingAudio.reserve(FRAME_SIZE);
 }
 
 SpeechSegmenter::~SpeechSegmenter() {
@@ -68,62 +69,85 @@ void SpeechSegmenter::shutdown() {
 void SpeechSegmenter::processAudioChunk(const std::vector<float>& chunk) {
     if (!m_whisperCtx) return;
     
-    // Process in frames for VAD
-    for (size_t i = 0; i + FRAME_SIZE <= chunk.size(); i += FRAME_SIZE) {
-        std::vector<float> frame(chunk.begin() + i, chunk.begin() + i + FRAME_SIZE);
+    // Chunks are not a multiple of the frame size; samples left over from
+    // the previous chunk are completed here rather than dropped, so every
+    // sample is looked at exactly once
+    size_t offset = 0;
+    if (!m_pendingAudio.empty()) {
+        size_t needed = std::min(FRAME_SIZE - m_pendingAudio.size(), chunk.size());
+        m_pendingAudio.insert(m_pendingAudio.end(), chunk.begin(), chunk.begin() + needed);
+        offset = needed;
         
-        bool voiceDetected = detectVoiceActivity(frame);
+        if (m_pendingAudio.size() < FRAME_SIZE) {
+            return;
+        }
+        processFrame(m_pendingAudio.data());
+        m_pendingAudio.clear();
+    }
+    
+    // Remaining frames are read in place from the chunk
+    for (; offset + FRAME_SIZE <= chunk.size(); offset += FRAME_SIZE) {
+        processFrame(chunk.data() + offset);
+    }
+    
+    // Keep only the unprocessed tail (less than one frame)
+    m_pendingAudio.assign(chunk.begin() + offset, chunk.end());
+}
+
+void SpeechSegmenter::processFrame(const float* frame) {
+    // Silence frames needed to end a segment
+    const int silenceThresholdFrames = static_cast<int>(m_silenceDuration * FRAMES_PER_SECOND);
+    
+    bool voiceDetected = detectVoiceActivity(frame, FRAME_SIZE);
+    
+    if (voiceDetected) {
+        // Voice detected - accumulate speech
+        if (!m_isSpeaking) {
+            log("INFO", "Speech started");
+            m_isSpeaking = true;
+            m_speechBuffer.clear();
+        }
         
-        if (voiceDetected) {
-            // Voice detected - accumulate speech
-            if (!m_isSpeaking) {
-                log("INFO", "Speech started");
-                m_isSpeaking = true;
-                m_speechBuffer.clear();
-            }
-            
-            m_speechBuffer.insert(m_speechBuffer.end(), frame.begin(), frame.end());
-            m_silenceFrames = 0;
-            m_speechFrames++;
+        m_speechBuffer.insert(m_speechBuffer.end(), frame, frame + FRAME_SIZE);
+        m_silenceFrames = 0;
+        m_speechFrames++;
+        
+    } else if (m_isSpeaking) {
+        // In speech but current frame is silent
+        m_speechBuffer.insert(m_speechBuffer.end(), frame, frame + FRAME_SIZE);
+        m_silenceFrames++;
+        
+        // Check if we've had enough silence to end the segment
+        if (m_silenceFrames >= silenceThresholdFrames) {
+            // End of speech segment
+            float speechDuration = static_cast<float>(m_speechFrames) / FRAMES_PER_SECOND;
             
-        } else if (m_isSpeaking) {
-            // In speech but current frame is silent
-            m_speechBuffer.insert(m_speechBuffer.end(), frame.begin(), frame.end());
-            m_silenceFrames++;
+            log("INFO", "Speech ended (duration: " + std::to_string(speechDuration) + "s)");
             
-            // Check if we've had enough silence to end the segment
-            int silenceThresholdFrames = static_cast<int>(m_silenceDuration * FRAMES_PER_SECOND);
-            if (m_silenceFrames >= silenceThresholdFrames) {
-                // End of speech segment
-                float speechDuration = static_cast<float>(m_speechFrames) / FRAMES_PER_SECOND;
-                
-                log("INFO", "Speech ended (duration: " + std::to_string(speechDuration) + "s)");
+            // Only transcribe if speech was long enough
+            if (speechDuration >= m_minSpeechDuration) {
+                // Transcribe the complete segment
+                std::string transcription = transcribe(m_speechBuffer);
                 
-                // Only transcribe if speech was long enough
-                if (speechDuration >= m_minSpeechDuration) {
-                    // Transcribe the complete segment
-                    std::string transcription = transcribe(m_speechBuffer);
+                if (!transcription.empty()) {
+                    log("INFO", "Transcription: " + transcription);
                     
-                    if (!transcription.empty()) {
-                        log("INFO", "Transcription: " + transcription);
-                        
-                        // Call the callback
-                        std::lock_guard<std::mutex> lock(m_callbackMutex);
-                        if (m_callback) {
-                            m_callback(transcription);
-                        }
+                    // Call the callback
+                    std::lock_guard<std::mutex> lock(m_callbackMutex);
+                    if (m_callback) {
+                        m_callback(transcription);
                     }
-                } else {
-                    log("INFO", "Speech too short, ignoring (duration: " + 
-                        std::to_string(speechDuration) + "s)");
                 }
-                
-                // Reset state
-                m_isSpeaking = false;
-                m_speechBuffer.clear();
-                m_silenceFrames = 0;
-                m_speechFrames = 0;
+            } else {
+                log("INFO", "Speech too short, ignoring (duration: " + 
+                    std::to_string(speechDuration) + "s)");
             }
+            
+            // Reset state
+            m_isSpeaking = false;
+            m_speechBuffer.clear();
+            m_silenceFrames = 0;
+            m_speechFrames = 0;
         }
     }
 }
@@ -133,20 +157,20 @@ void SpeechSegmenter::setTranscriptionCallback(TranscriptionCallback callback) {
     m_callback = callback;
 }
 
-bool SpeechSegmenter::detectVoiceActivity(const std::vector<float>& frame) {
-    float energy = calculateEnergy(frame);
+bool SpeechSegmenter::detectVoiceActivity(const float* frame, size_t size) {
+    float energy = calculateEnergy(frame, size);
     return energy > m_vadThreshold;
 }
 
-float SpeechSegmenter::calculateEnergy(const std::vector<float>& frame) {
-    if (frame.empty()) return 0.0f;
+float SpeechSegmenter::calculateEnergy(const float* frame, size_t size) {
+    if (size == 0) return 0.0f;
     
     float sum = 0.0f;
-    for (float sample : frame) {
-        sum += sample * sample;
+    for (size_t i = 0; i < size; ++i) {
+        sum += frame[i] * frame[i];
     }
     
-    return sum / frame.size();
+    return sum / size;
 }
 
 std::string SpeechSegmenter::transcribe(const std::vector<float>& samples) {
@@ -178,44 +202,49 @@ std::string SpeechSegmenter::transcribe(const std::vector<float>& samples) {
 }
 
 std::string SpeechSegmenter::cleanTranscription(const std::string& text) {
-    std::string result = text;
-    
-    // Remove content inside brackets [], braces {}, and parentheses ()
-    // This handles [BLANK_AUDIO], [MUSIC], etc.
-    std::regex bracketPattern(R"(\[[^\]]*\]|\{[^\}]*\}|\([^\)]*\))");
-    result = std::regex_replace(result, bracketPattern, "");
-    
-    // Remove punctuation (periods, commas, exclamation marks, question marks, etc.)
-    std::regex punctPattern(R"([.,!?;:])");
-    result = std::regex_replace(result, punctPattern, "");
-    
-    // Collapse multiple spaces into single space
-    std::regex multiSpacePattern(R"(\s+)");
-    result = std::regex_replace(result, multiSpacePattern, " ");
-    
-    // Trim whitespace
-    result.erase(0, result.find_first_not_of(" \t\n\r"));
-    result.erase(result.find_last_not_of(" \t\n\r") + 1);
+    // Single left-to-right pass that:
+    // - removes content inside brackets [], braces {}, and parentheses ()
+    //   (this handles [BLANK_AUDIO], [MUSIC], etc.)
+    // - removes punctuation (periods, commas, exclamation marks, question marks, etc.)
+    // - collapses whitespace runs into one space and trims both ends
+    // - converts to lowercase for processing
+    std::string result;
+    result.reserve(text.size());
+    bool pendingSpace = false;
     
-    // Convert to lowercase for processing
-    std::transform(result.begin(), result.end(), result.begin(), ::tolower);
+    for (size_t i = 0; i < text.size(); ++i) {
+        unsigned char c = static_cast<unsigned char>(text[i]);
+        
+        if (c == '[' || c == '{' || c == '(') {
+            char closer = c == '[' ? ']' : (c == '{' ? '}' : ')');
+            size_t close = text.find(closer, i + 1);
+            if (close != std::string::npos) {
+                i = close;
+                continue;
+            }
+        }
+        
+        if (c == '.' || c == ',' || c == '!' || c == '?' || c == ';' || c == ':') {
+            continue;
+        }
+        
+        if (std::isspace(c)) {
+            pendingSpace = true;
+            continue;
+        }
+        
+        if (pendingSpace && !result.empty()) {
+            result += ' ';
+        }
+        pendingSpace = false;
+        result += static_cast<char>(std::tolower(c));
+    }
     
     return result;
 }
 
 void SpeechSegmenter::log(const std::string& level, const std::string& message) {
-    std::lock_guard<std::mutex> lock(m_logMutex);
-    
-    auto now = std::time(nullptr);
-    auto tm = *std::localtime(&now);
-    
-    std::ofstream logFile("/tmp/willow.log", std::ios::app);
-    if (logFile.is_open()) {
-        logFile << std::put_time(&tm, "%Y-%m-%d %H:%M:%S") 
-                << " [SpeechSegmenter] [" << level << "] " << message << std::endl;
-    }
-    
-    std::cout << "[SpeechSegmenter] [" << level << "] " << message << std::endl;
+    m_executor->log(level, "[SpeechSegmenter] " + message);
 }
 
 } // namespace VoiceAssistant
@@ -1,8 +1,10 @@
 #pragma once
 
+#include "CommandExecutor.hpp"
 #include <whisper.h>
 #include <vector>
 #include <string>
+#include <memory>
 #include <functional>
 #include <mutex>
 #include <atomic>
@@ -21,7 +23,7 @@ class SpeechSegmenter {
 public:
     using TranscriptionCallback = std::function<void(const std::string&)>;
     
-    SpeechSegmenter();
+    explicit SpeechSegmenter(std::shared_ptr<CommandExecutor> executor);  // executor: used for logging
     ~SpeechSegmenter();
     
     // Initialize with whisper model
@@ -59,27 +61,30 @@ private:
     std::vector<float> m_speechBuffer;
     int m_silenceFrames;
     int m_speechFrames;
+    std::vector<float> m_pendingAudio;  // Samples not yet processed as a full frame
     
     // Constants
     static constexpr int SAMPLE_RATE = 16000;
     static constexpr int FRAMES_PER_SECOND = 50;  // 20ms frames
-    static constexpr int FRAME_SIZE = SAMPLE_RATE / FRAMES_PER_SECOND;
+    static constexpr size_t FRAME_SIZE = SAMPLE_RATE / FRAMES_PER_SECOND;
+    static constexpr int RESERVED_SPEECH_SECONDS = 5;
     
     // Callback
     TranscriptionCallback m_callback;
     std::mutex m_callbackMutex;
     
     // VAD helper
-    bool detectVoiceActivity(const std::vector<float>& frame);
-    float calculateEnergy(const std::vector<float>& frame);
+    void processFrame(const float* frame);  // FRAME_SIZE samples
+    bool detectVoiceActivity(const float* frame, size_t size);
+    float calculateEnergy(const float* frame, size_t size);
     
     // Transcription
     std::string transcribe(const std::vector<float>& samples);
     std::string cleanTranscription(const std::string& text);
     
-    // Logging
+    // Logging, through the executor's log
+    std::shared_ptr<CommandExecutor> m_executor;
     void log(const std::string& level, const std::string& message);
-    std::mutex m_logMutex;
 };
 
 } // namespace VoiceAssistant
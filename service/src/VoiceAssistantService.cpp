@@ -1,10 +1,10 @@
 #include "VoiceAssistantService.hpp"
 #include <fstream>
-#include <sstream>
+#include <iterator>
 #include <algorithm>
-#include <ctime>
-#include <iomanip>
 #include <cstdlib>
+#include <cerrno>
+#include <cstring>
 #include <filesystem>
 #include <chrono>
 
@@ -18,11 +18,13 @@ VoiceAssistantService::VoiceAssistantService(sdbus::IConnection& connection, std
     , m_currentWorker(nullptr)
     , m_isRunning(false)
     , m_currentMode(Mode::Normal)
+    , m_lastEmittedWorker(nullptr)
     , m_hotword("hey")
     , m_commandThreshold(0.8)
     , m_processingInterval(1.5)
     , m_whisperModel("ggml-tiny.en.bin")
     , m_gpuAcceleration(false)
+    , m_logLevel("INFO")
     , m_typingExitPhrases({"stop typing", "exit typing", "normal mode", "go to normal mode"})
     , m_stopAudioThread(false)
     , m_pulseAudio(nullptr)
@@ -126,12 +128,20 @@ VoiceAssistantService::VoiceAssistantService(sdbus::IConnection& connection, std
     m_logFile = "/tmp/willow.log";
     m_modelPath = std::string(home) + "/.local/share/willow/models";
 
+    // JSON settings: compact for D-Bus replies, indented for the config file
+    m_jsonWriter["indentation"] = "";
+    m_jsonFileWriter["indentation"] = "  ";
+
+    // The executor is created first: it also writes the log, including
+    // the messages from loading the configuration
+    m_executor = std::make_shared<CommandExecutor>();
+
     // Load configuration
     loadConfig();
 
     // Create shared components
-    m_executor = std::make_shared<CommandExecutor>();
-    m_segmenter = std::make_shared<SpeechSegmenter>();
+    m_executor->setLogLevel(m_logLevel);
+    m_segmenter = std::make_shared<SpeechSegmenter>(m_executor);
     
     // Initialize whisper in segmenter
     if (!m_segmenter->initialize(m_modelPath, m_whisperModel, m_gpuAcceleration)) {
@@ -183,6 +193,12 @@ void VoiceAssistantService::SetMode(const std::string& mode) {
     
     std::lock_guard<std::mutex> lock(m_modeMutex);
     
+    // Mode state lives in memory; only an actual change restarts the
+    // workers, retunes the segmenter and is announced over D-Bus
+    if (newMode == m_currentMode) {
+        return;
+    }
+    
     // Stop current worker
     if (m_currentWorker) {
         m_currentWorker->stop();
@@ -194,6 +210,12 @@ void VoiceAssistantService::SetMode(const std::string& mode) {
     // Set and start new worker
     updateModeWorkers();
     
+    // The extension clears its buffer on ModeChanged, so the next buffer
+    // must be emitted even if it matches the last one (e.g. after a
+    // command -> normal -> command round trip)
+    m_lastEmittedBuffer.clear();
+    m_lastEmittedWorker = nullptr;
+    
     emitModeChanged(mode, oldModeStr);
     
     log("INFO", "Mode changed from " + oldModeStr + " to " + mode);
@@ -208,7 +230,8 @@ std::map<std::string, sdbus::Variant> VoiceAssistantService::GetStatus() {
     
     status["is_running"] = sdbus::Variant(m_isRunning.load());
     status["current_mode"] = sdbus::Variant(modeToString(m_currentMode));
-    status["current_buffer"] = sdbus::Variant(GetBuffer());
+    // The buffer is left out: the extension polls this, and the buffer
+    // already reaches it through BufferChanged (or GetBuffer on demand)
     status["command_count"] = sdbus::Variant(static_cast<int32_t>(m_commands.size()));
     status["whisper_loaded"] = sdbus::Variant(m_segmenter->isWhisperLoaded());
     
@@ -217,19 +240,16 @@ std::map<std::string, sdbus::Variant> VoiceAssistantService::GetStatus() {
 
 std::string VoiceAssistantService::GetConfig() {
     std::lock_guard<std::mutex> lock(m_configMutex);
-    Json::StreamWriterBuilder writer;
-    return Json::writeString(writer, configToJson());
+    return Json::writeString(m_jsonWriter, configToJson());
 }
 
 void VoiceAssistantService::UpdateConfig(const std::string& configJson) {
     std::lock_guard<std::mutex> lock(m_configMutex);
     
-    Json::CharReaderBuilder reader;
     Json::Value root;
     std::string errs;
-    std::istringstream stream(configJson);
     
-    if (Json::parseFromStream(reader, stream, &root, &errs)) {
+    if (parseJson(configJson, root, errs)) {
         // Store old settings to detect changes
         bool oldGpuSetting = m_gpuAcceleration;
         std::string oldModel = m_whisperModel;
@@ -248,6 +268,7 @@ void VoiceAssistantService::UpdateConfig(const std::string& configJson) {
         }
         
         // Update workers with new config
+        m_executor->setLogLevel(m_logLevel);
         m_normalWorker->setHotword(m_hotword);
         m_commandWorker->setCommands(m_commands);
         m_commandWorker->setThreshold(m_commandThreshold);
@@ -304,6 +325,12 @@ void VoiceAssistantService::SetConfigValue(const std::string& key, const sdbus::
 std::string VoiceAssistantService::GetCommands() {
     std::lock_guard<std::mutex> lock(m_commandsMutex);
     
+    // Serialized once per command-table change rather than on every request
+    // (an empty table still serializes to "[]")
+    if (!m_commandsJson.empty()) {
+        return m_commandsJson;
+    }
+    
     Json::Value root(Json::arrayValue);
     for (const auto& cmd : m_commands) {
         Json::Value cmdJson;
@@ -319,8 +346,8 @@ std::string VoiceAssistantService::GetCommands() {
         root.append(cmdJson);
     }
     
-    Json::StreamWriterBuilder writer;
-    return Json::writeString(writer, root);
+    m_commandsJson = Json::writeString(m_jsonWriter, root);
+    return m_commandsJson;
 }
 
 void VoiceAssistantService::AddCommand(const std::string& name, const std::string& command,
@@ -338,6 +365,10 @@ void VoiceAssistantService::AddCommand(const std::string& name, const std::strin
     newCmd.command = command;
     newCmd.phrases = phrases;
     m_commands.push_back(newCmd);
+    m_commandsJson.clear();
+    
+    // Keep the worker's phrase index in step with the command list
+    m_commandWorker->setCommands(m_commands);
     
     saveConfig();
     log("INFO", "Command added: " + name);
@@ -351,6 +382,8 @@ void VoiceAssistantService::RemoveCommand(const std::string& name) {
     
     if (it != m_commands.end()) {
         m_commands.erase(it, m_commands.end());
+        m_commandsJson.clear();
+        m_commandWorker->setCommands(m_commands);
         saveConfig();
         log("INFO", "Command removed: " + name);
     }
@@ -402,8 +435,9 @@ void VoiceAssistantService::Stop() {
 
 void VoiceAssistantService::Restart() {
     log("INFO", "Restarting Voice Assistant");
+    // Stop() has joined the audio thread and freed the PulseAudio stream by
+    // the time it returns, so there is nothing to wait for
     Stop();
-    std::this_thread::sleep_for(std::chrono::milliseconds(500));
     Start();
 }
 
@@ -546,14 +580,31 @@ void VoiceAssistantService::audioProcessingLoop() {
 // Transcription handling
 
 void VoiceAssistantService::handleTranscription(const std::string& text) {
-    log("INFO", "Transcription received: '" + text + "'");
+    // The segmenter already logs every transcription at INFO
+    if (m_executor->isLogEnabled("DEBUG")) {
+        log("DEBUG", "Transcription received: '" + text + "'");
+    }
     
     // Pass to current mode worker
     if (m_currentWorker && m_isRunning) {
         m_currentWorker->processTranscription(text);
         
-        // Emit buffer changed for UI update
-        emitBufferChanged(GetBuffer());
+        // Emit buffer changed for UI update, unless the same worker still
+        // shows the same buffer (e.g. a repeated command or an ignored utterance)
+        std::string buffer = GetBuffer();
+        bool changed;
+        {
+            // SetMode resets the dedupe state from the D-Bus thread
+            std::lock_guard<std::mutex> lock(m_modeMutex);
+            changed = buffer != m_lastEmittedBuffer || m_currentWorker != m_lastEmittedWorker;
+            if (changed) {
+                m_lastEmittedBuffer = buffer;
+                m_lastEmittedWorker = m_currentWorker;
+            }
+        }
+        if (changed) {
+            emitBufferChanged(buffer);
+        }
     }
 }
 
@@ -587,39 +638,56 @@ void VoiceAssistantService::updateModeWorkers() {
 void VoiceAssistantService::loadConfig() {
     std::lock_guard<std::mutex> lock(m_configMutex);
     
-    // Check if config file exists
-    if (!fs::exists(m_configPath)) {
-        // Try to copy default config from system location
+    // Open first and only fall back when that fails, rather than checking
+    // existence separately (an extra stat, and racy besides)
+    std::ifstream file(m_configPath);
+    if (!file.is_open()) {
+        const int openErrno = errno;
+        
+        // A config that exists but can't be read is reported as such, not
+        // replaced by the system default
+        if (openErrno != ENOENT) {
+            log("ERROR", "Failed to open config " + m_configPath + ": " + std::strerror(openErrno));
+            log("WARNING", "Using built-in defaults");
+            return;
+        }
+        
+        // Try to copy default config from system location; the directory
+        // is only created when there is one to copy
         const std::string systemConfig = "/usr/share/willow/config.json";
-        if (fs::exists(systemConfig)) {
-            try {
-                fs::path configPath(m_configPath);
-                fs::create_directories(configPath.parent_path());
-                fs::copy_file(systemConfig, m_configPath);
-                log("INFO", "Created config from system default: " + m_configPath);
-            } catch (const std::exception& e) {
-                log("ERROR", "Failed to copy default config: " + std::string(e.what()));
-                log("WARNING", "Using built-in defaults");
-                return;
-            }
-        } else {
+        if (!std::ifstream(systemConfig).is_open()) {
             log("WARNING", "Config file not found and no system default available, using built-in defaults");
             return;
         }
+        
+        std::error_code ec;
+        fs::create_directories(fs::path(m_configPath).parent_path(), ec);
+        if (!ec) {
+            fs::copy_file(systemConfig, m_configPath, ec);
+        }
+        if (ec) {
+            log("ERROR", "Failed to copy default config: " + ec.message());
+            log("WARNING", "Using built-in defaults");
+            return;
+        }
+        log("INFO", "Created config from system default: " + m_configPath);
+        
+        file.open(m_configPath);
+        if (!file.is_open()) {
+            log("WARNING", "Config file not found, using defaults");
+            return;
+        }
     }
     
-    std::ifstream file(m_configPath);
-    if (!file.is_open()) {
-        log("WARNING", "Config file not found, using defaults");
-        return;
-    }
+    std::string configText((std::istreambuf_iterator<char>(file)), std::istreambuf_iterator<char>());
     
-    Json::CharReaderBuilder reader;
     Json::Value root;
     std::string errs;
     
-    if (Json::parseFromStream(reader, file, &root, &errs)) {
+    if (parseJson(configText, root, errs)) {
         jsonToConfig(root);
+        // A later save producing identical text can skip the write
+        m_savedConfigText = std::move(configText);
         log("INFO", "Configuration loaded from: " + m_configPath);
     } else {
         log("ERROR", "Failed to parse config: " + errs);
@@ -631,19 +699,51 @@ void VoiceAssistantService::saveConfig() {
     
     Json::Value root = configToJson();
     
-    // Ensure directory exists
-    fs::path configPath(m_configPath);
-    fs::create_directories(configPath.parent_path());
+    std::string configText = Json::writeString(m_jsonFileWriter, root);
     
-    std::ofstream file(m_configPath);
-    if (file.is_open()) {
-        Json::StreamWriterBuilder writer;
-        writer["indentation"] = "  ";
-        file << Json::writeString(writer, root);
-        log("INFO", "Configuration saved");
-    } else {
+    // Nothing changed since the last save (e.g. a setting re-sent with the same value)
+    if (configText == m_savedConfigText) {
+        return;
+    }
+    
+    // Write to a temporary file and rename it over the config, so readers
+    // never see a partially written file. The directory normally exists
+    // already; it is only created when the open fails, instead of being
+    // checked before every save.
+    const std::string tempPath = m_configPath + ".tmp";
+    std::ofstream file(tempPath, std::ios::trunc);
+    if (!file.is_open()) {
+        std::error_code dirError;
+        fs::create_directories(fs::path(m_configPath).parent_path(), dirError);
+        file.open(tempPath, std::ios::trunc);
+    }
+    if (!file.is_open()) {
         log("ERROR", "Failed to save config to: " + m_configPath);
+        return;
     }
+    
+    file << configText;
+    file.close();
+    
+    // A failed write must not replace the existing config
+    std::error_code ec;
+    if (!file.fail()) {
+        fs::rename(tempPath, m_configPath, ec);
+    }
+    if (file.fail() || ec) {
+        fs::remove(tempPath, ec);
+        log("ERROR", "Failed to save config to: " + m_configPath);
+        return;
+    }
+    
+    m_savedConfigText = std::move(configText);
+    log("INFO", "Configuration saved");
+}
+
+bool VoiceAssistantService::parseJson(const std::string& text, Json::Value& root, std::string& errs) const {
+    // Parse straight from the string, without wrapping it in a stream
+    std::unique_ptr<Json::CharReader> reader(m_jsonReader.newCharReader());
+    return reader->parse(text.data(), text.data() + text.size(), &root, &errs);
 }
 
 Json::Value VoiceAssistantService::configToJson() const {
@@ -656,7 +756,7 @@ Json::Value VoiceAssistantService::configToJson() const {
     root["gpu_acceleration"] = m_gpuAcceleration;
     
     Json::Value logging;
-    logging["level"] = "INFO";
+    logging["level"] = m_logLevel;
     logging["file"] = m_logFile;
     root["logging"] = logging;
     
@@ -698,6 +798,10 @@ void VoiceAssistantService::jsonToConfig(const Json::Value& json) {
         log("INFO", "Whisper model configured: " + m_whisperModel);
     }
     
+    if (json.isMember("logging") && json["logging"].isMember("level")) {
+        m_logLevel = json["logging"]["level"].asString();
+    }
+    
     if (json.isMember("gpu_acceleration")) {
         m_gpuAcceleration = json["gpu_acceleration"].asBool();
         log("INFO", "GPU acceleration configured: " + std::string(m_gpuAcceleration ? "enabled" : "disabled"));
@@ -705,27 +809,33 @@ void VoiceAssistantService::jsonToConfig(const Json::Value& json) {
     
     // Load typing mode exit phrases
     if (json.isMember("typing_mode") && json["typing_mode"].isMember("exit_phrases")) {
-        m_typingExitPhrases.clear();
         const auto& exitPhrases = json["typing_mode"]["exit_phrases"];
+        std::vector<std::string> phrases;
         if (exitPhrases.isArray()) {
             for (const auto& phrase : exitPhrases) {
-                std::string exitPhrase = phrase.asString();
-                // Convert to lowercase for matching
-                std::transform(exitPhrase.begin(), exitPhrase.end(), exitPhrase.begin(), ::tolower);
-                m_typingExitPhrases.push_back(exitPhrase);
+                // Lowercased by TypingModeWorker::setExitPhrases
+                phrases.push_back(phrase.asString());
             }
-            log("INFO", "Loaded " + std::to_string(m_typingExitPhrases.size()) + " typing exit phrases");
+            log("INFO", "Loaded " + std::to_string(phrases.size()) + " typing exit phrases");
         }
+        m_typingExitPhrases.swap(phrases);
     }
     
     if (json.isMember("commands") && json["commands"].isArray()) {
-        std::lock_guard<std::mutex> lock(m_commandsMutex);
-        m_commands.clear();
+        // Parsed into a local table and swapped in once complete: a malformed
+        // entry (asString() throws) leaves the current commands untouched, and
+        // m_commandsMutex is not held while parsing and logging
+        std::vector<Command> commands;
         
         for (const auto& cmdJson : json["commands"]) {
-            // Skip if this is a comment-only object (all keys start with _)
+            // Skip if this is a comment-only object (all keys start with _).
+            // Keys are checked in place instead of copying them all out first.
+            if (!cmdJson.isObject()) {
+                continue;
+            }
             bool isCommentOnly = true;
-            for (const auto& key : cmdJson.getMemberNames()) {
+            for (auto it = cmdJson.begin(); it != cmdJson.end(); ++it) {
+                const std::string key = it.name();
                 if (!key.empty() && key[0] != '_') {
                     isCommentOnly = false;
                     break;
@@ -745,11 +855,15 @@ void VoiceAssistantService::jsonToConfig(const Json::Value& json) {
                 }
             }
             
-            m_commands.push_back(cmd);
             log("INFO", "Loaded command: " + cmd.name + " with " + std::to_string(cmd.phrases.size()) + " phrases");
+            commands.push_back(std::move(cmd));
         }
         
-        log("INFO", "Total commands loaded: " + std::to_string(m_commands.size()));
+        log("INFO", "Total commands loaded: " + std::to_string(commands.size()));
+        
+        std::lock_guard<std::mutex> lock(m_commandsMutex);
+        m_commands.swap(commands);
+        m_commandsJson.clear();
     }
 }
 
@@ -776,16 +890,8 @@ std::string VoiceAssistantService::modeToString(Mode mode) const {
 // Helper methods
 
 void VoiceAssistantService::log(const std::string& level, const std::string& message) {
-    std::lock_guard<std::mutex> lock(m_logMutex);
-    
-    auto now = std::time(nullptr);
-    auto tm = *std::localtime(&now);
-    
-    std::ofstream logFile(m_logFile, std::ios::app);
-    if (logFile.is_open()) {
-        logFile << std::put_time(&tm, "%Y-%m-%d %H:%M:%S") 
-                << " [" << level << "] " << message << std::endl;
-    }
+    // One writer for the whole service, with the logging.level filter
+    m_executor->log(level, message);
 }
 
 } // namespace VoiceAssistant
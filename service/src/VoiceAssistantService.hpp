@@ -11,8 +11,6 @@
 #include <thread>
 #include <atomic>
 #include <mutex>
-#include <condition_variable>
-#include <queue>
 
 #include "CommandExecutor.hpp"
 #include "SpeechSegmenter.hpp"
@@ -76,6 +74,7 @@ private:
     void saveConfig();
     Json::Value configToJson() const;
     void jsonToConfig(const Json::Value& json);
+    bool parseJson(const std::string& text, Json::Value& root, std::string& errs) const;
 
     // Mode management
     void setModeInternal(Mode mode);
@@ -106,8 +105,14 @@ private:
     std::atomic<Mode> m_currentMode;
     mutable std::mutex m_modeMutex;
     
+    // Last BufferChanged payload and the worker it came from (guarded by
+    // m_modeMutex; reset by SetMode)
+    std::string m_lastEmittedBuffer;
+    const ModeWorker* m_lastEmittedWorker;
+    
     // Commands
     std::vector<Command> m_commands;
+    std::string m_commandsJson;  // GetCommands() reply; cleared whenever m_commands changes
     mutable std::mutex m_commandsMutex;
 
     // Configuration
@@ -116,10 +121,17 @@ private:
     double m_processingInterval;
     std::string m_whisperModel;
     bool m_gpuAcceleration;
+    std::string m_logLevel;  // DEBUG, INFO, WARNING or ERROR
     std::vector<std::string> m_typingExitPhrases;
     std::string m_configPath;
     std::string m_modelPath;
+    std::string m_savedConfigText;  // Last contents written by saveConfig()
     mutable std::mutex m_configMutex;
+    
+    // JSON builders, configured once in the constructor
+    Json::StreamWriterBuilder m_jsonWriter;      // D-Bus replies
+    Json::StreamWriterBuilder m_jsonFileWriter;  // config.json
+    Json::CharReaderBuilder m_jsonReader;
 
     // Audio processing
     std::thread m_audioThread;
@@ -130,7 +142,6 @@ private:
 
     // Logging
     std::string m_logFile;
-    mutable std::mutex m_logMutex;
 };
 
 } // namespace VoiceAssistant